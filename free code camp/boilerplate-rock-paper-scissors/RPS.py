@@ -1,219 +1,226 @@
+import os
+
+from markov import MarkovEnsemble, MarkovModel
+from sliding_window import SlidingWindowCounter
+
 MOVES = ("R", "P", "S")
+MOVE_CODES = {"R": 0, "P": 1, "S": 2}
 COUNTER_MOVE = {"R": "P", "P": "S", "S": "R"}
-RESULT_SCORES = {
-    ("R", "S"): 1,
-    ("S", "P"): 1,
-    ("P", "R"): 1,
-    ("S", "R"): -1,
-    ("P", "S"): -1,
-    ("R", "P"): -1,
-}
 BOT_NAMES = ("quincy", "kris", "mrugesh", "abbey")
 
-
-def _outcome_score(ours, theirs):
-    if ours == theirs:
-        return 0
-    return RESULT_SCORES.get((ours, theirs), -RESULT_SCORES.get((theirs, ours), 0))
-
-
-def _simulate_quincy(state_slice):
-    choices = ("R", "R", "P", "P", "S")
-    state_slice["counter"] = state_slice.get("counter", 0) + 1
-    return choices[state_slice["counter"] % len(choices)]
-
-
-def _simulate_kris(prev_play):
-    if prev_play == "":
-        prev_play = "R"
-    return COUNTER_MOVE[prev_play]
-
-
-def _simulate_mrugesh(state_slice, prev_play):
-    opponent_history = state_slice.setdefault("opponent_history", [])
-    opponent_history.append(prev_play)
-    last_ten = opponent_history[-10:]
-
-    if last_ten:
-        most_frequent = max(set(last_ten), key=last_ten.count)
-    else:
-        most_frequent = ""
-
-    if most_frequent == "":
-        most_frequent = "S"
-
-    return COUNTER_MOVE[most_frequent]
-
-
-def _simulate_abbey(state_slice, prev_play):
-    opponent_history = state_slice.setdefault("opponent_history", [])
-    play_order = state_slice.setdefault(
-        "play_order",
-        {
-            "RR": 0,
-            "RP": 0,
-            "RS": 0,
-            "PR": 0,
-            "PP": 0,
-            "PS": 0,
-            "SR": 0,
-            "SP": 0,
-            "SS": 0,
-        },
-    )
-
+# Moves are encoded as R=0, P=1, S=2 and bots by their index in BOT_NAMES.
+QUINCY, KRIS, MRUGESH, ABBEY = range(4)
+NO_BOT = -1
+BEATS = (1, 2, 0)  # BEATS[m] is the move that beats m
+# OUTCOME[ours * 3 + theirs]: 1 win, 0 tie, -1 loss
+OUTCOME = (0, -1, 1, 1, 0, -1, -1, 1, 0)
+# sorted() on (weight, name) breaks weight ties by name; this is each bot's rank in that order
+NAME_RANK = tuple(sorted(BOT_NAMES).index(name) for name in BOT_NAMES)
+
+QUINCY_CYCLE = (0, 0, 1, 1, 2)
+MRUGESH_WINDOW = 10
+NO_MOVE = 3  # mrugesh's window also holds the empty first move
+MRUGESH_SYMBOLS = ("R", "P", "S", "")
+# Detection locks onto a bot once its prediction accuracy reaches LOCK_ACCURACY
+# and leads the runner-up by LOCK_MARGIN, and lets go below DROP_ACCURACY
+LOCK_ACCURACY = 0.6
+LOCK_MARGIN = 0.15
+DROP_ACCURACY = 0.52
+# Unknown opponents: trust the Markov ensemble once its recent hit rate beats this
+ENSEMBLE_ORDERS = (1, 2, 3, 4)
+ENSEMBLE_ACCURACY = 0.45
+
+
+class PlayerState:
+    """Everything player() remembers between moves, in fixed-size storage.
+
+    Detection only reads running counts, the current predictions and the
+    windows kept by the bot simulations, so memory is the same after ten
+    moves or ten million. reset() starts a new game.
+    """
+
+    __slots__ = ("matches", "totals", "predictions", "has_predictions", "identified", "last_guess",
+                 "rounds", "quincy_counter", "mrugesh_window", "abbey_model", "ensemble")
+
+    def __init__(self):
+        self.matches = [0] * 4
+        self.totals = [0] * 4
+        self.predictions = [0] * 4
+        # mrugesh: counts over the last ten moves, including the empty first move
+        self.mrugesh_window = SlidingWindowCounter(MRUGESH_WINDOW, MRUGESH_SYMBOLS)
+        # abbey: counts of (previous, next) move pairs
+        self.abbey_model = MarkovModel(1)
+        # the opponent's own move patterns, for bots we do not simulate
+        self.ensemble = MarkovEnsemble(ENSEMBLE_ORDERS)
+        self.reset()
+
+    def reset(self):
+        for bot in range(4):
+            self.matches[bot] = 0
+            self.totals[bot] = 0
+            self.predictions[bot] = 0
+        self.has_predictions = False
+        self.identified = NO_BOT
+        self.last_guess = -1
+        self.rounds = 0
+        self.quincy_counter = 0
+        self.mrugesh_window.clear()
+        self.abbey_model.reset()
+        self.ensemble.reset()
+
+
+def _simulate_quincy(state):
+    state.quincy_counter += 1
+    return QUINCY_CYCLE[state.quincy_counter % 5]
+
+
+def _simulate_kris(prev_code):
+    if prev_code < 0:
+        prev_code = 0
+    return BEATS[prev_code]
+
+
+def _simulate_mrugesh(state, prev_code):
+    window = state.mrugesh_window
+    window.push(NO_MOVE if prev_code < 0 else prev_code)
+    most_frequent = window.most_common()
+    if most_frequent == NO_MOVE:
+        most_frequent = 2
+    return BEATS[most_frequent]
+
+
+def _simulate_abbey(state, prev_code):
+    model = state.abbey_model
+    model.update(prev_code if prev_code >= 0 else 0)
+    return BEATS[model.predict()]
+
+
+def _update_detection(state, prev_code):
+    matches = state.matches
+    totals = state.totals
+    predictions = state.predictions
+
+    if state.has_predictions:
+        for bot in range(4):
+            totals[bot] += 1
+            if predictions[bot] == prev_code:
+                matches[bot] += 1
+
+    best_bot = NO_BOT
+    best_accuracy = 0.0
+    first_accuracy = second_accuracy = -1.0
+    for bot in range(4):
+        total = totals[bot]
+        if total == 0:
+            continue
+        accuracy = matches[bot] / total
+        if accuracy > first_accuracy:
+            first_accuracy, second_accuracy = accuracy, first_accuracy
+        elif accuracy > second_accuracy:
+            second_accuracy = accuracy
+        if accuracy > best_accuracy:
+            best_accuracy = accuracy
+            best_bot = bot
+    if second_accuracy < 0:
+        second_accuracy = 0.0
+
+    if best_bot != NO_BOT:
+        best_total = totals[best_bot]
+        if best_total >= 3 and best_accuracy >= LOCK_ACCURACY:
+            if best_bot == state.identified or best_accuracy - second_accuracy >= LOCK_MARGIN or best_total >= 6:
+                state.identified = best_bot
+
+    current_id = state.identified
+    if current_id != NO_BOT:
+        id_total = totals[current_id]
+        id_accuracy = matches[current_id] / id_total if id_total else 0
+        if id_total >= 4 and id_accuracy < DROP_ACCURACY:
+            state.identified = NO_BOT
+
+
+def _choose_move(state):
+    predictions = state.predictions
+    identified = state.identified
+    if identified != NO_BOT:
+        return BEATS[predictions[identified]]
+
+    ensemble = state.ensemble
+    if ensemble.accuracy() >= ENSEMBLE_ACCURACY:
+        return BEATS[ensemble.predict()]
+
+    matches = state.matches
+    totals = state.totals
+    w0 = w1 = w2 = w3 = 0.2
+    if totals[0]:
+        w0 = (matches[0] / totals[0]) ** 2 * max(1, totals[0] / 2)
+    if totals[1]:
+        w1 = (matches[1] / totals[1]) ** 2 * max(1, totals[1] / 2)
+    if totals[2]:
+        w2 = (matches[2] / totals[2]) ** 2 * max(1, totals[2] / 2)
+    if totals[3]:
+        w3 = (matches[3] / totals[3]) ** 2 * max(1, totals[3] / 2)
+
+    # If one bot is clearly ahead, lean on that prediction even before locking in.
+    top_bot = NO_BOT
+    top_weight = second_weight = float("-inf")
+    for bot, weight in ((0, w0), (1, w1), (2, w2), (3, w3)):
+        if top_bot == NO_BOT or weight > top_weight or (weight == top_weight and NAME_RANK[bot] > NAME_RANK[top_bot]):
+            second_weight = top_weight
+            top_weight, top_bot = weight, bot
+        elif weight > second_weight:
+            second_weight = weight
+
+    if top_weight > 0 and (top_weight - second_weight) >= 0.5:
+        return BEATS[predictions[top_bot]]
+
+    p0, p1, p2, p3 = predictions
+    best_guess = 1
+    best_score = float("-inf")
+    for candidate in range(3):
+        base = candidate * 3
+        score = 0.0
+        score += w0 * OUTCOME[base + p0]
+        score += w1 * OUTCOME[base + p1]
+        score += w2 * OUTCOME[base + p2]
+        score += w3 * OUTCOME[base + p3]
+        if score > best_score:
+            best_score = score
+            best_guess = candidate
+    return best_guess
+
+
+_STATE = PlayerState()
+
+
+def reset(state=_STATE):
+    """Forget the current game; player() also does this when handed prev_play=""."""
+    state.reset()
+
+
+def player(prev_play, state=_STATE):
     if not prev_play:
-        prev_play = "R"
-    opponent_history.append(prev_play)
-
-    last_two = "".join(opponent_history[-2:])
-    if len(last_two) == 2:
-        play_order[last_two] += 1
-
-    potential_plays = [
-        prev_play + "R",
-        prev_play + "P",
-        prev_play + "S",
-    ]
-
-    sub_order = {k: play_order[k] for k in potential_plays}
-    prediction = max(sub_order, key=sub_order.get)[-1]
-
-    return COUNTER_MOVE[prediction]
-
-
-def _init_state_if_needed(state):
-    if state.get("detection") is None:
-        state["detection"] = {bot: {"matches": 0, "total": 0} for bot in BOT_NAMES}
-        state["last_predictions"] = {}
-        state["identified"] = None
-        state["sim"] = {
-            "quincy": {"counter": 0},
-            "kris": {},
-            "mrugesh": {"opponent_history": []},
-            "abbey": {
-                "opponent_history": [],
-                "play_order": {
-                    "RR": 0,
-                    "RP": 0,
-                    "RS": 0,
-                    "PR": 0,
-                    "PP": 0,
-                    "PS": 0,
-                    "SR": 0,
-                    "SP": 0,
-                    "SS": 0,
-                },
-            },
-        }
-
-
-def player(prev_play, opponent_history=[], player_history=[], state={"detection": None}):
-    if prev_play == "" and (opponent_history or player_history):
-        opponent_history.clear()
-        player_history.clear()
-        state.clear()
-
-    _init_state_if_needed(state)
-
-    detection = state["detection"]
-    last_predictions = state.get("last_predictions", {})
-
-    if prev_play:
-        opponent_history.append(prev_play)
-        for bot_name, predicted in last_predictions.items():
-            stats = detection[bot_name]
-            stats["total"] += 1
-            if prev_play == predicted:
-                stats["matches"] += 1
-
-        accuracy_table = []
-        best_bot = None
-        best_accuracy = 0.0
-        for bot_name, stats in detection.items():
-            total = stats["total"]
-            if total == 0:
-                continue
-            accuracy = stats["matches"] / total
-            accuracy_table.append((accuracy, total, bot_name))
-            if accuracy > best_accuracy:
-                best_accuracy = accuracy
-                best_bot = bot_name
-
-        accuracy_table.sort(reverse=True)
-        second_accuracy = accuracy_table[1][0] if len(accuracy_table) > 1 else 0.0
-
-        if best_bot:
-            best_total = detection[best_bot]["total"]
-            if best_total >= 3 and best_accuracy >= 0.6:
-                if best_bot == state.get("identified") or best_accuracy - second_accuracy >= 0.15 or best_total >= 6:
-                    state["identified"] = best_bot
-
-        current_id = state.get("identified")
-        if current_id:
-            id_stats = detection[current_id]
-            id_accuracy = id_stats["matches"] / id_stats["total"] if id_stats["total"] else 0
-            if id_stats["total"] >= 4 and id_accuracy < 0.52:
-                state["identified"] = None
-
-        elif best_accuracy < 0.5:
-            state["identified"] = None
-
-    prev_input = player_history[-1] if player_history else ""
-    sim_state = state["sim"]
-
-    predictions = {
-        "quincy": _simulate_quincy(sim_state["quincy"]),
-        "kris": _simulate_kris(prev_input),
-        "mrugesh": _simulate_mrugesh(sim_state["mrugesh"], prev_input),
-        "abbey": _simulate_abbey(sim_state["abbey"], prev_input),
-    }
-
-    state["last_predictions"] = dict(predictions)
-
-    identified = state.get("identified")
-
-    if identified:
-        predicted_move = predictions.get(identified, "R")
-        guess = COUNTER_MOVE.get(predicted_move, "P")
+        # RPS_game.play opens every game with an empty previous move
+        state.reset()
     else:
-        best_guess = None
-        best_score = float("-inf")
-
-        accuracy_weights = {}
-        for bot_name, stats in detection.items():
-            total = stats["total"]
-            if total == 0:
-                accuracy_weights[bot_name] = 0.2
-            else:
-                accuracy = stats["matches"] / total
-                accuracy_weights[bot_name] = accuracy ** 2 * max(1, total / 2)
-
-        # If one bot is clearly ahead, lean on that prediction even before locking in.
-        sorted_candidates = sorted(
-            (
-                (accuracy_weights.get(bot_name, 0), bot_name)
-                for bot_name in BOT_NAMES
-            ),
-            reverse=True,
-        )
-
-        top_weight, top_bot = sorted_candidates[0]
-        second_weight = sorted_candidates[1][0] if len(sorted_candidates) > 1 else 0.0
-
-        if top_weight > 0 and (top_weight - second_weight) >= 0.5:
-            predicted_move = predictions.get(top_bot, "R")
-            guess = COUNTER_MOVE.get(predicted_move, "P")
-        else:
-            for candidate in MOVES:
-                score = 0.0
-                for bot_name, predicted in predictions.items():
-                    weight = accuracy_weights.get(bot_name, 0.2)
-                    score += weight * _outcome_score(candidate, predicted)
-                if score > best_score:
-                    best_score = score
-                    best_guess = candidate
-            guess = best_guess or "P"
-
-    player_history.append(guess)
-    return guess
+        prev_code = MOVE_CODES[prev_play]
+        _update_detection(state, prev_code)
+        state.ensemble.update(prev_code)
+
+    prev_code = state.last_guess
+    predictions = state.predictions
+    predictions[QUINCY] = _simulate_quincy(state)
+    predictions[KRIS] = _simulate_kris(prev_code)
+    predictions[MRUGESH] = _simulate_mrugesh(state, prev_code)
+    predictions[ABBEY] = _simulate_abbey(state, prev_code)
+    state.has_predictions = True
+
+    guess = _choose_move(state)
+    state.last_guess = guess
+    state.rounds += 1
+    return MOVES[guess]
+
+
+if os.environ.get("RPS_PROFILE"):
+    # profiling enables itself once it has finished importing, whichever of
+    # the two modules was imported first
+    import profiling  # noqa: F401
@@ -0,0 +1,275 @@
+# Batched RPS simulation with NumPy: many independent games stepped in lockstep.
+#
+# Every game pits RPS.player (with its own detection thresholds) against one
+# of quincy, kris, mrugesh, abbey or a random player. The four bots only react
+# to our moves, so their state is exactly the simulation the player already
+# keeps; the opponent's real move is read from it. `noise` makes a bot play a
+# random move with that probability, so seeds give genuinely different games.
+#
+#   python batch_sim.py --games 1000 --copies 200 --lock 0.5 0.6 0.7 --drop 0.45 0.52
+
+import argparse
+from itertools import product
+
+import numpy as np
+
+from markov import DEFAULT_DECAY
+from RPS import (ABBEY, BEATS, BOT_NAMES, DROP_ACCURACY, ENSEMBLE_ACCURACY, ENSEMBLE_ORDERS, KRIS, LOCK_ACCURACY,
+                 LOCK_MARGIN, MRUGESH, MRUGESH_SYMBOLS, MRUGESH_WINDOW, NAME_RANK, NO_BOT, NO_MOVE, OUTCOME, QUINCY,
+                 QUINCY_CYCLE)
+from sliding_window import tie_table
+
+OPPONENTS = BOT_NAMES + ("random",)
+RANDOM = len(BOT_NAMES)
+
+_BEATS = np.array(BEATS)
+_OUTCOME = np.array(OUTCOME).reshape(3, 3)
+_QUINCY_CYCLE = np.array(QUINCY_CYCLE)
+_MRUGESH_TIES = np.array(tie_table(MRUGESH_SYMBOLS))
+_POW5 = 5 ** np.arange(4)
+_LOWEST_BIT = np.array([(mask & -mask).bit_length() - 1 for mask in range(16)])
+# Bots in the order _choose_move prefers them when their weights tie
+_TIE_ORDER = np.array(sorted(range(4), key=lambda bot: -NAME_RANK[bot]))
+
+
+class _MrugeshWindows:
+    """SlidingWindowCounter for every game at once, as (games, ...) arrays."""
+
+    def __init__(self, size):
+        self.games = np.arange(size)
+        self.ring = np.zeros((size, MRUGESH_WINDOW), dtype=np.int64)
+        self.next_same = np.zeros((size, MRUGESH_WINDOW), dtype=np.int64)
+        self.counts = np.zeros((size, 4), dtype=np.int64)
+        self.first = np.zeros((size, 4), dtype=np.int64)
+        self.last = np.zeros((size, 4), dtype=np.int64)
+
+    def push(self, codes, time):
+        games, counts = self.games, self.counts
+        slot = time % MRUGESH_WINDOW
+        if time >= MRUGESH_WINDOW:
+            evicted = self.ring[:, slot]
+            counts[games, evicted] -= 1
+            still = counts[games, evicted] > 0
+            self.first[games[still], evicted[still]] = self.next_same[still, slot]
+
+        self.ring[:, slot] = codes
+        seen = counts[games, codes] > 0
+        self.next_same[games[seen], self.last[games[seen], codes[seen]] % MRUGESH_WINDOW] = time
+        self.first[games[~seen], codes[~seen]] = time
+        self.last[games, codes] = time
+        counts[games, codes] += 1
+
+    def predictions(self):
+        """Vectorized _simulate_mrugesh: the move beating each window's most common symbol."""
+        counts = self.counts
+        tied = counts == counts.max(axis=1, keepdims=True)
+        mask = (tied << np.arange(4)).sum(axis=1)
+        present = counts > 0
+        rank = ((self.first[:, None, :] < self.first[:, :, None]) & present[:, None, :]).sum(axis=2)
+        key = ((np.arange(4) + 1) * _POW5[rank] * present).sum(axis=1)
+        single = (mask & (mask - 1)) == 0
+        most_frequent = np.where(single, _LOWEST_BIT[mask], _MRUGESH_TIES[(key << 4) + mask])
+        most_frequent[most_frequent == NO_MOVE] = 2
+        return _BEATS[most_frequent]
+
+
+class _MarkovModels:
+    """MarkovModel for every game at once; all games have seen the same number of moves."""
+
+    def __init__(self, size, order):
+        self.games = np.arange(size)
+        self.order = order
+        self.contexts = 3 ** order
+        self.counts = np.zeros((size, self.contexts, 3), dtype=np.int64)
+        self.context = np.zeros(size, dtype=np.int64)
+        self.seen = 0
+
+    def update(self, moves):
+        if self.seen >= self.order:
+            self.counts[self.games, self.context, moves] += 1
+        self.context = (self.context * 3 + moves) % self.contexts
+        self.seen += 1
+
+    def predict(self):
+        return self.counts[self.games, self.context].argmax(axis=1)
+
+
+class _MarkovEnsembles:
+    """MarkovEnsemble for every game at once."""
+
+    def __init__(self, size, orders=ENSEMBLE_ORDERS, decay=DEFAULT_DECAY):
+        self.games = np.arange(size)
+        self.models = [_MarkovModels(size, order) for order in orders]
+        self.decay = decay
+        self.predictions = np.zeros((size, len(orders)), dtype=np.int64)
+        self.scores = np.zeros((size, len(orders)))
+        self.prediction = np.zeros(size, dtype=np.int64)
+        self.started = False
+        self.hits = np.zeros(size)
+        self.scored = 0.0
+
+    def update(self, moves):
+        if self.started:
+            self.scores = self.scores * self.decay + (self.predictions == moves[:, None])
+            self.hits = self.hits * self.decay + (self.prediction == moves)
+            self.scored = self.scored * self.decay + 1
+        self.started = True
+
+        votes = np.zeros((len(self.games), 3))
+        for i, model in enumerate(self.models):
+            model.update(moves)
+            self.predictions[:, i] = model.predict()
+            votes[self.games, self.predictions[:, i]] += self.scores[:, i]
+        self.prediction = votes.argmax(axis=1)
+
+    def accuracy(self):
+        return self.hits / self.scored if self.scored else np.zeros(len(self.games))
+
+
+def simulate(opponents, num_games, lock=LOCK_ACCURACY, margin=LOCK_MARGIN, drop=DROP_ACCURACY,
+             noise=0.0, seed=None):
+    """Play len(opponents) games of num_games rounds each, all at once.
+
+    `opponents` holds an index into OPPONENTS per game; the thresholds may be
+    scalars or per-game arrays. Returns per-game (wins, losses, ties) arrays.
+    """
+    opponents = np.asarray(opponents)
+    size = len(opponents)
+    lock = np.broadcast_to(np.asarray(lock, dtype=float), size)
+    margin = np.broadcast_to(np.asarray(margin, dtype=float), size)
+    drop = np.broadcast_to(np.asarray(drop, dtype=float), size)
+    rng = np.random.default_rng(seed)
+    games = np.arange(size)
+
+    matches = np.zeros((size, 4), dtype=np.int64)
+    totals = np.zeros((size, 4), dtype=np.int64)
+    predictions = np.zeros((size, 4), dtype=np.int64)
+    identified = np.full(size, NO_BOT)
+    last_guess = np.full(size, -1)
+    opponent_prev = np.zeros(size, dtype=np.int64)
+    mrugesh = _MrugeshWindows(size)
+    abbey = _MarkovModels(size, 1)
+    ensemble = _MarkovEnsembles(size)
+    wins = np.zeros(size, dtype=np.int64)
+    losses = np.zeros(size, dtype=np.int64)
+    ties = np.zeros(size, dtype=np.int64)
+
+    for time in range(num_games):
+        if time:
+            _update_detection(matches, totals, predictions, identified, opponent_prev, lock, margin, drop)
+            ensemble.update(opponent_prev)
+
+        prev_code = np.maximum(last_guess, 0)
+        predictions[:, QUINCY] = _QUINCY_CYCLE[(time + 1) % 5]
+        predictions[:, KRIS] = _BEATS[prev_code]
+        mrugesh.push(np.where(last_guess < 0, NO_MOVE, last_guess), time)
+        predictions[:, MRUGESH] = mrugesh.predictions()
+        abbey.update(prev_code)
+        predictions[:, ABBEY] = _BEATS[abbey.predict()]
+
+        guess = _choose_moves(matches, totals, predictions, identified, ensemble)
+
+        opponent_move = predictions[games, np.minimum(opponents, RANDOM - 1)]
+        scramble = (opponents == RANDOM) | (rng.random(size) < noise)
+        opponent_move = np.where(scramble, rng.integers(0, 3, size), opponent_move)
+
+        outcome = _OUTCOME[guess, opponent_move]
+        wins += outcome == 1
+        losses += outcome == -1
+        ties += outcome == 0
+        last_guess = guess
+        opponent_prev = opponent_move
+
+    return wins, losses, ties
+
+
+def _update_detection(matches, totals, predictions, identified, prev_code, lock, margin, drop):
+    totals += 1
+    matches += predictions == prev_code[:, None]
+
+    accuracy = matches / totals
+    best_bot = accuracy.argmax(axis=1)
+    games = np.arange(len(best_bot))
+    best_accuracy = accuracy[games, best_bot]
+    second_accuracy = np.sort(accuracy, axis=1)[:, -2]
+    best_total = totals[games, best_bot]
+
+    lock_in = (best_accuracy > 0) & (best_total >= 3) & (best_accuracy >= lock) & (
+        (best_bot == identified) | (best_accuracy - second_accuracy >= margin) | (best_total >= 6))
+    identified[lock_in] = best_bot[lock_in]
+
+    current = np.maximum(identified, 0)
+    id_total = totals[games, current]
+    id_accuracy = matches[games, current] / id_total
+    identified[(identified != NO_BOT) & (id_total >= 4) & (id_accuracy < drop)] = NO_BOT
+
+
+def _choose_moves(matches, totals, predictions, identified, ensemble):
+    games = np.arange(len(identified))
+    has_totals = totals > 0
+    accuracy = np.divide(matches, totals, out=np.zeros(matches.shape), where=has_totals)
+    weights = np.where(has_totals, accuracy ** 2 * np.maximum(1, totals / 2), 0.2)
+
+    top_bot = _TIE_ORDER[weights[:, _TIE_ORDER].argmax(axis=1)]
+    top_weight = weights[games, top_bot]
+    second_weight = np.sort(weights, axis=1)[:, -2]
+    lean = (top_weight > 0) & (top_weight - second_weight >= 0.5)
+
+    scores = np.zeros((len(games), 3))
+    for bot in range(4):
+        scores += weights[:, bot, None] * _OUTCOME[:, predictions[:, bot]].T
+    guess = scores.argmax(axis=1)
+    guess = np.where(lean, _BEATS[predictions[games, top_bot]], guess)
+    guess = np.where(ensemble.accuracy() >= ENSEMBLE_ACCURACY, _BEATS[ensemble.prediction], guess)
+    locked = identified != NO_BOT
+    return np.where(locked, _BEATS[predictions[games, np.maximum(identified, 0)]], guess)
+
+
+def win_rates(wins, losses):
+    """Per-game win rate in percent, as RPS_game.play reports it."""
+    decided = wins + losses
+    return np.divide(wins * 100.0, decided, out=np.zeros(len(wins)), where=decided > 0)
+
+
+def sweep(locks, margins, drops, opponents=OPPONENTS, copies=100, num_games=1000, noise=0.0, seed=0):
+    """Mean and minimum win rate per opponent for every threshold combination, in one batch."""
+    settings = list(product(locks, margins, drops))
+    opponent_ids = [OPPONENTS.index(name) for name in opponents]
+    grid = np.array([(s, o) for s in range(len(settings)) for o in opponent_ids for _ in range(copies)])
+    params = np.array(settings)[grid[:, 0]]
+    wins, losses, _ = simulate(grid[:, 1], num_games, params[:, 0], params[:, 1], params[:, 2], noise, seed)
+    rates = win_rates(wins, losses).reshape(len(settings), len(opponent_ids), copies)
+
+    rows = []
+    for (lock, margin, drop), setting_rates in zip(settings, rates):
+        rows.append({
+            "lock": lock,
+            "margin": margin,
+            "drop": drop,
+            "mean": {name: float(r.mean()) for name, r in zip(opponents, setting_rates)},
+            "min": {name: float(r.min()) for name, r in zip(opponents, setting_rates)},
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep RPS detection thresholds with a batched simulation.")
+    parser.add_argument("--opponents", nargs="+", default=list(OPPONENTS), choices=OPPONENTS)
+    parser.add_argument("--games", type=int, default=1000, help="rounds per game")
+    parser.add_argument("--copies", type=int, default=100, help="games per opponent and setting")
+    parser.add_argument("--lock", type=float, nargs="+", default=[LOCK_ACCURACY])
+    parser.add_argument("--margin", type=float, nargs="+", default=[LOCK_MARGIN])
+    parser.add_argument("--drop", type=float, nargs="+", default=[DROP_ACCURACY])
+    parser.add_argument("--noise", type=float, default=0.05, help="chance a bot plays a random move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = sweep(args.lock, args.margin, args.drop, args.opponents, args.copies, args.games, args.noise, args.seed)
+    print(f"{'lock':>6}{'margin':>8}{'drop':>6}" + "".join(f"{name:>10}" for name in args.opponents))
+    for row in rows:
+        print(f"{row['lock']:>6.2f}{row['margin']:>8.2f}{row['drop']:>6.2f}"
+              + "".join(f"{row['mean'][name]:>10.1f}" for name in args.opponents))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Quiet, seeded evaluation of RPS.player and a benchmark that catches regressions.
+#
+# evaluate() plays the player against each bot, with private bot state and its
+# own random generator, and prints nothing. The benchmark also measures how
+# many moves per second player() makes on its own. Given a baseline, it exits
+# non-zero when speed or win rates regress:
+#
+#   python benchmark.py --json baseline.json
+#   python benchmark.py --baseline baseline.json --tolerance 0.2
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import profiling
+from RPS import MOVES, player
+from tournament import bot_strategies, fresh_bot, load_bots, play_match, win_rate
+
+OPPONENTS = ("quincy", "kris", "mrugesh", "abbey", "random")
+# The bots the freeCodeCamp tests require a 60% win rate against
+GRADED = ("quincy", "kris", "mrugesh", "abbey")
+MIN_WIN_RATE = 60.0
+
+
+def evaluate(player_func=player, opponents=OPPONENTS, num_games=1000, seed=0):
+    """Win/loss/tie counts and win rate against each opponent, without printing."""
+    bots = bot_strategies(load_bots(seed))
+    results = {}
+    for name in opponents:
+        p1_wins, p2_wins, ties = play_match(fresh_bot(player_func), fresh_bot(bots[name]), num_games)
+        results[name] = {
+            "wins": p1_wins,
+            "losses": p2_wins,
+            "ties": ties,
+            "win_rate": win_rate(p1_wins, p2_wins),
+        }
+    return results
+
+
+def moves_per_sec(player_func=player, num_moves=20000, seed=0, repeats=3):
+    """Best-of-`repeats` speed of player_func against a fixed random move sequence."""
+    rng = random.Random(seed)
+    opponent_moves = [""] + [rng.choice(MOVES) for _ in range(num_moves - 1)]
+    best = float("inf")
+    for _ in range(repeats):
+        func = fresh_bot(player_func)
+        start = time.perf_counter()
+        for move in opponent_moves:
+            func(move)
+        best = min(best, time.perf_counter() - start)
+    return num_moves / best
+
+
+def run_benchmark(num_games=1000, num_moves=20000, seed=0):
+    return {
+        "moves_per_sec": moves_per_sec(num_moves=num_moves, seed=seed),
+        "win_rates": {name: result["win_rate"] for name, result in evaluate(num_games=num_games, seed=seed).items()},
+    }
+
+
+def check_regression(result, baseline=None, tolerance=0.2, max_win_rate_drop=2.0):
+    """Messages describing every way `result` is worse than required or than `baseline`."""
+    problems = []
+    for name in GRADED:
+        rate = result["win_rates"].get(name)
+        if rate is not None and rate < MIN_WIN_RATE:
+            problems.append(f"win rate against {name} is {rate:.1f}%, below {MIN_WIN_RATE:.0f}%")
+    if baseline:
+        floor = baseline["moves_per_sec"] * (1 - tolerance)
+        if result["moves_per_sec"] < floor:
+            problems.append(f"{result['moves_per_sec']:.0f} moves/s is below {floor:.0f} "
+                            f"({baseline['moves_per_sec']:.0f} baseline - {tolerance:.0%})")
+        for name in GRADED:
+            rate, before = result["win_rates"].get(name), baseline["win_rates"].get(name)
+            if rate is not None and before is not None and rate < before - max_win_rate_drop:
+                problems.append(f"win rate against {name} fell from {before:.1f}% to {rate:.1f}%")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RPS.player speed and win rates.")
+    parser.add_argument("--games", type=int, default=1000, help="games per opponent")
+    parser.add_argument("--moves", type=int, default=20000, help="moves for the speed measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional drop in moves/s")
+    parser.add_argument("--profile", action="store_true", help="also time each section of player()")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.games, args.moves, args.seed)
+    print(f"player(): {result['moves_per_sec']:,.0f} moves/s")
+    for name, rate in result["win_rates"].items():
+        print(f"  vs {name:<10}{rate:6.1f}%")
+    if args.profile:
+        # measured separately so the timers do not slow the numbers above
+        profiling.enable()
+        moves_per_sec(num_moves=args.moves, seed=args.seed, repeats=1)
+        profiling.disable()
+        print()
+        profiling.print_report()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = check_regression(result, baseline, args.tolerance)
+    for problem in problems:
+        print("REGRESSION:", problem)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ play(player, kris, 1000)
 play(player, mrugesh, 1000)
 
 # Uncomment line below to play interactively against a bot:
-play(human, abbey, 20, verbose=True)
+# play(human, abbey, 20, verbose=True)
 
 # Uncomment line below to play against a bot that plays randomly:
 # play(human, random_player, 1000)
@@ -0,0 +1,112 @@
+# Variable-order Markov models of an RPS move stream, and an ensemble of them.
+#
+# Moves are integer codes R=0, P=1, S=2. A model of order k keeps transition
+# counts for every k-move context in one flat list indexed by
+# context * 3 + next_move, where the context is the last k moves read as a
+# base-3 number. Updating and predicting are O(1) for any order.
+
+# Per-move decay of each model's score in MarkovEnsemble
+DEFAULT_DECAY = 0.9
+
+
+class MarkovModel:
+    """Counts of which move follows each of the 3**order possible contexts."""
+
+    __slots__ = ("order", "contexts", "counts", "context", "seen")
+
+    def __init__(self, order):
+        self.order = order
+        self.contexts = 3 ** order
+        self.counts = [0] * (self.contexts * 3)
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.context = 0
+        self.seen = 0
+
+    def update(self, move):
+        if self.seen >= self.order:
+            self.counts[self.context * 3 + move] += 1
+        self.context = (self.context * 3 + move) % self.contexts
+        self.seen += 1
+
+    def predict(self):
+        """Most frequent next move after the current context; ties go to the lowest code."""
+        base = self.context * 3
+        counts = self.counts
+        prediction = 0
+        if counts[base + 1] > counts[base + prediction]:
+            prediction = 1
+        if counts[base + 2] > counts[base + prediction]:
+            prediction = 2
+        return prediction
+
+
+class MarkovEnsemble:
+    """Markov models of several orders voting with their recent accuracy.
+
+    Each model's score is an exponentially decayed count of its correct
+    predictions, so the ensemble follows whichever order currently explains
+    the opponent. accuracy() is the decayed hit rate of the combined vote.
+    """
+
+    __slots__ = ("models", "decay", "predictions", "scores", "prediction", "started", "hits", "scored")
+
+    def __init__(self, orders=(1, 2, 3), decay=DEFAULT_DECAY):
+        self.models = [MarkovModel(order) for order in orders]
+        self.decay = decay
+        self.predictions = [0] * len(self.models)
+        self.scores = [0.0] * len(self.models)
+        self.reset()
+
+    def reset(self):
+        for i, model in enumerate(self.models):
+            model.reset()
+            self.predictions[i] = 0
+            self.scores[i] = 0.0
+        self.prediction = 0
+        self.started = False
+        self.hits = 0.0
+        self.scored = 0.0
+
+    def update(self, move):
+        decay = self.decay
+        predictions = self.predictions
+        scores = self.scores
+        if self.started:
+            for i in range(len(scores)):
+                scores[i] = scores[i] * decay + (predictions[i] == move)
+            self.hits = self.hits * decay + (self.prediction == move)
+            self.scored = self.scored * decay + 1
+        self.started = True
+
+        # MarkovModel.update and predict, inlined for every model
+        votes = [0.0, 0.0, 0.0]
+        for i, model in enumerate(self.models):
+            counts = model.counts
+            if model.seen >= model.order:
+                counts[model.context * 3 + move] += 1
+            context = model.context = (model.context * 3 + move) % model.contexts
+            model.seen += 1
+            base = context * 3
+            prediction = 0
+            if counts[base + 1] > counts[base]:
+                prediction = 1
+            if counts[base + 2] > counts[base + prediction]:
+                prediction = 2
+            predictions[i] = prediction
+            votes[prediction] += scores[i]
+        best = 0
+        if votes[1] > votes[0]:
+            best = 1
+        if votes[2] > votes[best]:
+            best = 2
+        self.prediction = best
+
+    def predict(self):
+        return self.prediction
+
+    def accuracy(self):
+        return self.hits / self.scored if self.scored else 0.0
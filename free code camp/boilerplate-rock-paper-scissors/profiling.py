@@ -0,0 +1,101 @@
+# Optional per-section profiling of RPS.player.
+#
+# enable() swaps each section of player() for a wrapper that counts calls and
+# accumulates perf_counter time; disable() puts the originals back, so there is
+# no overhead at all while profiling is off. Setting RPS_PROFILE=1 enables it
+# when RPS is imported and prints the report at exit.
+#
+#   import profiling
+#   profiling.enable()
+#   ... play games ...
+#   profiling.print_report()
+
+import atexit
+import os
+import time
+
+import RPS
+from markov import MarkovEnsemble
+
+# section name -> (owner, attribute) of the function player() calls for it
+SECTIONS = {
+    "detection": (RPS, "_update_detection"),
+    "ensemble": (MarkovEnsemble, "update"),
+    "quincy": (RPS, "_simulate_quincy"),
+    "kris": (RPS, "_simulate_kris"),
+    "mrugesh": (RPS, "_simulate_mrugesh"),
+    "abbey": (RPS, "_simulate_abbey"),
+    "choose": (RPS, "_choose_move"),
+}
+
+_originals = {}
+_stats = {name: [0, 0.0] for name in SECTIONS}  # name -> [calls, seconds]
+
+
+def _timed(func, counter):
+    perf_counter = time.perf_counter
+
+    def wrapper(*args):
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            counter[1] += perf_counter() - start
+            counter[0] += 1
+
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def enabled():
+    return bool(_originals)
+
+
+def enable():
+    if enabled():
+        return
+    for name, (owner, attr) in SECTIONS.items():
+        func = getattr(owner, attr)
+        _originals[name] = func
+        setattr(owner, attr, _timed(func, _stats[name]))
+
+
+def disable():
+    for name, func in _originals.items():
+        owner, attr = SECTIONS[name]
+        setattr(owner, attr, func)
+    _originals.clear()
+
+
+def reset():
+    for counter in _stats.values():
+        counter[0] = 0
+        counter[1] = 0.0
+
+
+def stats():
+    """Calls, total seconds and mean microseconds per call for each section."""
+    return {
+        name: {"calls": calls, "seconds": seconds, "mean_us": seconds / calls * 1e6 if calls else 0.0}
+        for name, (calls, seconds) in _stats.items()
+    }
+
+
+def report():
+    sections = stats()
+    total = sum(section["seconds"] for section in sections.values())
+    lines = [f"{'section':<12}{'calls':>10}{'total ms':>11}{'mean us':>10}{'share':>8}"]
+    for name, section in sorted(sections.items(), key=lambda item: -item[1]["seconds"]):
+        share = section["seconds"] / total * 100 if total else 0.0
+        lines.append(f"{name:<12}{section['calls']:>10}{section['seconds'] * 1000:>11.1f}"
+                     f"{section['mean_us']:>10.2f}{share:>7.1f}%")
+    return "\n".join(lines)
+
+
+def print_report():
+    print(report())
+
+
+if os.environ.get("RPS_PROFILE"):
+    enable()
+    atexit.register(print_report)
@@ -0,0 +1,121 @@
+# Sliding-window frequency counter with O(1) push/evict and most-common lookup.
+
+from itertools import permutations
+
+_TIE_TABLES = {}
+
+
+def tie_table(symbols):
+    """Winner of `max(set(window), key=window.count)` among tied symbols.
+
+    max() keeps the first tied symbol in set iteration order, which depends on
+    this process's string hashes and on the order the symbols were inserted,
+    i.e. the order they first appear in the window. Indexed by that order
+    (base len(symbols) + 1, one digit per rank) times 2**n plus a tie bitmask.
+    """
+    if symbols in _TIE_TABLES:
+        return _TIE_TABLES[symbols]
+    n = len(symbols)
+    base = n + 1
+    table = [-1] * (base ** n << n)
+    for size in range(1, n + 1):
+        for order in permutations(range(n), size):
+            key = sum((code + 1) * base ** rank for rank, code in enumerate(order))
+            iteration = [symbols.index(s) for s in set(symbols[code] for code in order)]
+            for mask in range(1, 1 << n):
+                tied = [code for code in iteration if mask >> code & 1]
+                if tied and all(code in order for code in tied):
+                    table[(key << n) + mask] = tied[0]
+    _TIE_TABLES[symbols] = table
+    return table
+
+
+class SlidingWindowCounter:
+    """Symbol counts over the last `size` pushes, with memory fixed at creation.
+
+    Symbols are integer codes indexing `symbols`, the strings whose set order
+    decides ties so most_common() matches `max(set(window), key=window.count)`
+    on the equivalent list of strings. Pushing evicts the oldest symbol once
+    the window is full; both cost O(1), as does most_common() without a tie.
+    """
+
+    __slots__ = ("size", "n", "base", "ring", "next_same", "counts", "first", "last",
+                 "members", "max_count", "time", "ties")
+
+    def __init__(self, size, symbols):
+        self.size = size
+        self.n = len(symbols)
+        self.base = self.n + 1
+        self.ties = tie_table(tuple(symbols))
+        self.ring = [0] * size
+        self.next_same = [0] * size  # time of the next push of the same symbol
+        self.counts = [0] * self.n
+        self.first = [0] * self.n  # time of each symbol's oldest push still in the window
+        self.last = [0] * self.n  # time of each symbol's newest push
+        self.members = [0] * (size + 1)  # members[c]: bitmask of symbols with count c
+        self.clear()
+
+    def clear(self):
+        for i in range(self.n):
+            self.counts[i] = 0
+        for c in range(self.size + 1):
+            self.members[c] = 0
+        self.members[0] = (1 << self.n) - 1
+        self.max_count = 0
+        self.time = 0
+
+    def __len__(self):
+        return min(self.time, self.size)
+
+    def count(self, code):
+        return self.counts[code]
+
+    def _move(self, code, old, new):
+        bit = 1 << code
+        self.members[old] &= ~bit
+        self.members[new] |= bit
+        self.counts[code] = new
+
+    def push(self, code):
+        t = self.time
+        slot = t % self.size
+        if t >= self.size:
+            evicted = self.ring[slot]
+            count = self.counts[evicted]
+            self._move(evicted, count, count - 1)
+            if count > 1:
+                self.first[evicted] = self.next_same[slot]
+            if count == self.max_count and not self.members[count]:
+                self.max_count = count - 1
+
+        self.ring[slot] = code
+        count = self.counts[code]
+        if count:
+            self.next_same[self.last[code] % self.size] = t
+        else:
+            self.first[code] = t
+        self.last[code] = t
+        self._move(code, count, count + 1)
+        if count + 1 > self.max_count:
+            self.max_count = count + 1
+        self.time = t + 1
+
+    def most_common(self):
+        """Code of the most frequent symbol in the window, or -1 if it is empty."""
+        if not self.max_count:
+            return -1
+        mask = self.members[self.max_count]
+        if not mask & (mask - 1):
+            return mask.bit_length() - 1
+
+        counts = self.counts
+        first = self.first
+        key = 0
+        for code in range(self.n):
+            if counts[code]:
+                rank = 0
+                for other in range(self.n):
+                    if counts[other] and first[other] < first[code]:
+                        rank += 1
+                key += (code + 1) * self.base ** rank
+        return self.ties[(key << self.n) + mask]
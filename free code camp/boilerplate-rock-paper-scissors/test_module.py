@@ -1,38 +1,156 @@
+import random
 import unittest
-from RPS_game import play, mrugesh, abbey, quincy, kris
-from RPS import player
+
+import profiling
+import RPS
+from RPS_game import mrugesh, abbey
+from RPS import PlayerState, player
+from markov import MarkovModel
+from sliding_window import SlidingWindowCounter
+from benchmark import GRADED, check_regression, evaluate, run_benchmark
+from tournament import fresh_bot, load_bots, play_match, run_tournament, win_rate
+
+try:
+    import batch_sim
+except ImportError:  # numpy is optional
+    batch_sim = None
 
 
 class UnitTests(unittest.TestCase):
-    print()
+    # Each game gets a fresh player and bots from a private copy of RPS_game,
+    # so results do not depend on games played earlier (main.py, other tests).
+    def play(self, bot_name):
+        bot = getattr(load_bots(), bot_name)
+        return win_rate(*play_match(fresh_bot(player), bot, 1000)[:2])
 
     def test_player_vs_quincy(self):
-        print("Testing game against quincy...")
-        actual = play(player, quincy, 1000) >= 60
+        actual = self.play("quincy") >= 60
         self.assertTrue(
             actual,
             'Expected player to defeat quincy at least 60% of the time.')
 
     def test_player_vs_abbey(self):
-        print("Testing game against abbey...")
-        actual = play(player, abbey, 1000) >= 60
+        actual = self.play("abbey") >= 60
         self.assertTrue(
             actual,
             'Expected player to defeat abbey at least 60% of the time.')
 
     def test_player_vs_kris(self):
-        print("Testing game against kris...")
-        actual = play(player, kris, 1000) >= 60
+        actual = self.play("kris") >= 60
         self.assertTrue(
             actual, 'Expected player to defeat kris at least 60% of the time.')
 
     def test_player_vs_mrugesh(self):
-        print("Testing game against mrugesh...")
-        actual = play(player, mrugesh, 1000) >= 60
+        actual = self.play("mrugesh") >= 60
         self.assertTrue(
             actual,
             'Expected player to defeat mrugesh at least 60% of the time.')
 
 
+class TournamentTests(unittest.TestCase):
+    def test_fresh_bots_do_not_share_state(self):
+        first = play_match(fresh_bot(player), fresh_bot(mrugesh), 200, seed=1)
+        second = play_match(fresh_bot(player), fresh_bot(mrugesh), 200, seed=1)
+        self.assertEqual(first, second)
+
+    def test_run_tournament_aggregates_seeds(self):
+        summary = run_tournament([("player", "quincy"), ("player", "random")], range(3), [100], workers=1)
+        self.assertEqual([row["p2"] for row in summary], ["quincy", "random"])
+        self.assertTrue(all(row["matches"] == 3 for row in summary))
+        self.assertGreaterEqual(summary[0]["min"], 60)
+
+
+class EvaluationTests(unittest.TestCase):
+    def test_evaluate_is_deterministic(self):
+        first = evaluate(num_games=300, seed=4)
+        second = evaluate(num_games=300, seed=4)
+        self.assertEqual(first, second)
+        self.assertTrue(all(first[name]["win_rate"] >= 60 for name in GRADED))
+
+    def test_benchmark_flags_regressions(self):
+        result = run_benchmark(num_games=100, num_moves=500)
+        self.assertEqual(check_regression(result, result), [])
+        faster = dict(result, moves_per_sec=result["moves_per_sec"] * 2)
+        self.assertEqual(len(check_regression(result, faster)), 1)
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        # RPS_PROFILE may have enabled profiling already; put it back afterwards
+        self.was_enabled = profiling.enabled()
+        self.saved_stats = {name: list(counter) for name, counter in profiling._stats.items()}
+        profiling.disable()
+
+    def tearDown(self):
+        for name, counter in self.saved_stats.items():
+            profiling._stats[name][:] = counter
+        if self.was_enabled:
+            profiling.enable()
+
+    def test_sections_are_counted_only_while_enabled(self):
+        original = RPS._choose_move
+        profiling.reset()
+        profiling.enable()
+        try:
+            play_match(fresh_bot(player), fresh_bot(abbey), 50)
+        finally:
+            profiling.disable()
+        stats = profiling.stats()
+        self.assertEqual(stats["choose"]["calls"], 50)
+        self.assertEqual(stats["detection"]["calls"], 49)
+        self.assertIs(RPS._choose_move, original)
+        self.assertIn("mrugesh", profiling.report())
+
+
+class PlayerStateTests(unittest.TestCase):
+    def test_empty_prev_play_starts_a_new_game(self):
+        state = PlayerState()
+        first = play_match(lambda prev: player(prev, state), fresh_bot(abbey), 300, seed=2)
+        second = play_match(lambda prev: player(prev, state), fresh_bot(abbey), 300, seed=2)
+        self.assertEqual(first, second)
+        self.assertEqual(state.rounds, 300)
+
+
+class MarkovTests(unittest.TestCase):
+    def test_model_learns_transitions(self):
+        model = MarkovModel(2)
+        for move in [0, 1, 2] * 10:
+            model.update(move)
+        self.assertEqual(model.predict(), 0)
+
+    def test_player_beats_unknown_cycle(self):
+        def cycle(prev_play, counter=[0]):
+            counter[0] += 1
+            return "RPSSP"[counter[0] % 5]
+
+        p1_wins, p2_wins, _ = play_match(fresh_bot(player), fresh_bot(cycle), 1000)
+        self.assertGreaterEqual(p1_wins / (p1_wins + p2_wins), 0.6)
+
+
+class SlidingWindowTests(unittest.TestCase):
+    def test_most_common_matches_reference(self):
+        symbols = ("R", "P", "S", "")
+        window = SlidingWindowCounter(10, symbols)
+        history = []
+        rng = random.Random(0)
+        for _ in range(5000):
+            code = rng.randrange(4)
+            window.push(code)
+            history.append(symbols[code])
+            last_ten = history[-10:]
+            self.assertEqual(symbols[window.most_common()], max(set(last_ten), key=last_ten.count))
+        self.assertEqual(len(window), 10)
+
+
+@unittest.skipIf(batch_sim is None, "numpy is not installed")
+class BatchSimTests(unittest.TestCase):
+    def test_batch_matches_scalar_games(self):
+        bots = load_bots()
+        wins, losses, ties = batch_sim.simulate(range(4), 300)
+        for bot, name in enumerate(batch_sim.OPPONENTS[:4]):
+            expected = play_match(fresh_bot(player), getattr(bots, name), 300)
+            self.assertEqual((wins[bot], losses[bot], ties[bot]), expected)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,161 @@
+# Parallel tournament runner for RPS strategies.
+#
+# Strategies are plain `player(prev_play)` callables like the bots in RPS_game.
+# Each match gets fresh copies of both, so state kept in mutable default
+# arguments never leaks between matches, and matches can run in any process.
+# The bots come from a private copy of RPS_game, so games played elsewhere
+# with the shared module (main.py, the unit tests) cannot change them.
+#
+#   python tournament.py --games 1000 --seeds 20 --workers 4
+
+import argparse
+import copy
+import importlib.util
+import random
+import statistics
+import types
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+from RPS import player
+
+
+def load_bots(seed=None):
+    """A private copy of RPS_game with untouched bot state.
+
+    With a seed, its random_player draws from its own random.Random instead
+    of the global generator.
+    """
+    spec = importlib.util.find_spec("RPS_game")
+    bots = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bots)
+    if seed is not None:
+        bots.random = random.Random(seed)
+    return bots
+
+
+def bot_strategies(bots):
+    return {
+        "quincy": bots.quincy,
+        "kris": bots.kris,
+        "mrugesh": bots.mrugesh,
+        "abbey": bots.abbey,
+        "random": bots.random_player,
+    }
+
+
+STRATEGIES = {"player": player, **bot_strategies(load_bots())}
+WINNING_PAIRS = {("P", "R"), ("R", "S"), ("S", "P")}  # (winner, loser) moves
+
+
+def fresh_bot(func):
+    """Return a copy of `func` with its own deep-copied default arguments."""
+    clone = types.FunctionType(
+        func.__code__, func.__globals__, func.__name__, copy.deepcopy(func.__defaults__), func.__closure__)
+    clone.__kwdefaults__ = copy.deepcopy(func.__kwdefaults__)
+    return clone
+
+
+def play_match(player1, player2, num_games, seed=None):
+    """Quiet version of RPS_game.play: returns (p1 wins, p2 wins, ties)."""
+    if seed is not None:
+        random.seed(seed)
+    p1_prev_play = ""
+    p2_prev_play = ""
+    p1_wins = p2_wins = ties = 0
+
+    for _ in range(num_games):
+        p1_play = player1(p2_prev_play)
+        p2_play = player2(p1_prev_play)
+        if p1_play == p2_play:
+            ties += 1
+        elif (p1_play, p2_play) in WINNING_PAIRS:
+            p1_wins += 1
+        else:
+            p2_wins += 1
+        p1_prev_play = p1_play
+        p2_prev_play = p2_play
+
+    return p1_wins, p2_wins, ties
+
+
+def win_rate(p1_wins, p2_wins):
+    """Player 1 win rate in percent, as RPS_game.play reports it."""
+    games_won = p1_wins + p2_wins
+    return p1_wins / games_won * 100 if games_won else 0
+
+
+def run_match(task):
+    name1, name2, num_games, seed = task
+    p1_wins, p2_wins, ties = play_match(
+        fresh_bot(STRATEGIES[name1]), fresh_bot(STRATEGIES[name2]), num_games, seed)
+    return {
+        "p1": name1,
+        "p2": name2,
+        "games": num_games,
+        "seed": seed,
+        "p1_wins": p1_wins,
+        "p2_wins": p2_wins,
+        "ties": ties,
+        "win_rate": win_rate(p1_wins, p2_wins),
+    }
+
+
+def summarize(results):
+    """Group match results by (p1, p2, games) into win-rate distributions."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["p1"], result["p2"], result["games"]), []).append(result["win_rate"])
+
+    summary = []
+    for (name1, name2, num_games), rates in sorted(groups.items()):
+        rates.sort()
+        summary.append({
+            "p1": name1,
+            "p2": name2,
+            "games": num_games,
+            "matches": len(rates),
+            "mean": statistics.fmean(rates),
+            "stdev": statistics.stdev(rates) if len(rates) > 1 else 0.0,
+            "min": rates[0],
+            "median": statistics.median(rates),
+            "max": rates[-1],
+        })
+    return summary
+
+
+def run_tournament(matchups, seeds, game_lengths, workers=None):
+    """Play every matchup for every seed and game length, fanned out over processes."""
+    tasks = [(name1, name2, num_games, seed)
+             for (name1, name2), seed, num_games in product(matchups, seeds, game_lengths)]
+    if workers == 1:
+        results = [run_match(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_match, tasks, chunksize=max(1, len(tasks) // 64)))
+    return summarize(results)
+
+
+def print_summary(summary):
+    print(f"{'p1':<10}{'p2':<10}{'games':>7}{'matches':>9}{'mean':>8}{'stdev':>8}{'min':>8}{'median':>8}{'max':>8}")
+    for row in summary:
+        print(f"{row['p1']:<10}{row['p2']:<10}{row['games']:>7}{row['matches']:>9}{row['mean']:>8.1f}"
+              f"{row['stdev']:>8.2f}{row['min']:>8.1f}{row['median']:>8.1f}{row['max']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an RPS tournament over a process pool.")
+    parser.add_argument("--players", nargs="+", default=["player"], choices=STRATEGIES)
+    parser.add_argument("--opponents", nargs="+", default=["quincy", "kris", "mrugesh", "abbey", "random"],
+                        choices=STRATEGIES)
+    parser.add_argument("--games", type=int, nargs="+", default=[1000], help="game lengths to play")
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds per matchup")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    matchups = [(name1, name2) for name1 in args.players for name2 in args.opponents]
+    print_summary(run_tournament(matchups, range(args.seeds), args.games, args.workers))
+
+
+if __name__ == "__main__":
+    main()
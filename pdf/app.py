@@ -1,6 +1,6 @@
 from flask import Flask, render_template, request, send_file
 import os
-from PIL import Image
+from PIL import Image, ImageOps
 from fpdf import FPDF
 import json
 import pikepdf # Added for PDF compression
@@ -24,6 +24,9 @@ else:
     app.config['SECRET_KEY'] = 'dev-secret-key'
     app.config['DEBUG'] = True
 
+# Images placed in a PDF are capped at this resolution (pixels per inch)
+app.config['IMAGE_TARGET_DPI'] = int(os.environ.get('IMAGE_TARGET_DPI', 300))
+
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -34,6 +37,52 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Image-to-PDF helpers
+MM_PER_INCH = 25.4
+EXIF_ORIENTATION = 0x0112
+PASSTHROUGH_MODES = {'RGB', 'L'}
+TRANSCODE_QUALITY = 90
+MIN_TARGET_DPI = 72
+MAX_TARGET_DPI = 1200
+
+def oriented_size(pil_image):
+    """Return (width, height) as the image will be displayed, honouring EXIF rotation."""
+    width, height = pil_image.size
+    if pil_image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+        return height, width
+    return width, height
+
+def is_passthrough(pil_image, max_pixels):
+    """Check whether an image can be handed to FPDF as-is: no rotation, scaling or colorspace change needed.
+
+    JPEGs are then embedded byte-for-byte (DCTDecode); other formats such as PNG
+    are decoded by FPDF and stored losslessly (FlateDecode), as before.
+    """
+    if pil_image.format == 'JPEG' and pil_image.mode not in PASSTHROUGH_MODES:
+        return False
+    if pil_image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+        return False
+    width, height = pil_image.size
+    return width <= max_pixels[0] and height <= max_pixels[1]
+
+def transcode_image(pil_image, max_pixels):
+    """Rotate, downscale and convert an image, returning an encoded buffer ready for FPDF."""
+    is_jpeg = pil_image.format == 'JPEG'
+    image = ImageOps.exif_transpose(pil_image)
+    if image.width > max_pixels[0] or image.height > max_pixels[1]:
+        image.thumbnail((max(max_pixels[0], 1), max(max_pixels[1], 1)), Image.LANCZOS)
+
+    output = BytesIO()
+    if is_jpeg:
+        if image.mode not in PASSTHROUGH_MODES:
+            image = image.convert('RGB')
+        image.save(output, format='JPEG', quality=TRANSCODE_QUALITY, optimize=True)
+    else:
+        # Keep PNGs lossless (screenshots, line art, transparency); FPDF stores alpha as a soft mask
+        image.save(output, format='PNG', optimize=True)
+    output.seek(0)
+    return output
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -65,10 +114,12 @@ def pdfcompress():
             return "Invalid file type! Only PDF files are allowed.", 400
 
         original_filename = uploaded_file.filename
-        temp_pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], original_filename)
+        # Per-request prefix so concurrent uploads of the same name don't clobber each other
+        job_id = secrets.token_hex(8)
+        temp_pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{original_filename}")
         uploaded_file.save(temp_pdf_path)
 
-        compressed_pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"compressed_{original_filename}")
+        compressed_pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"compressed_{job_id}_{original_filename}")
         
         try:
             # Open the PDF with PyMuPDF
@@ -194,6 +245,13 @@ def create_pdf_from_images():
         orientation = request.form.get('orientation', 'P') # P for Portrait, L for Landscape
         page_size = request.form.get('page_size', 'A4') # e.g., A4, Letter
         margin = float(request.form.get('margin', 10)) # in mm
+        try:
+            target_dpi = float(request.form.get('target_dpi', app.config['IMAGE_TARGET_DPI']))
+        except ValueError:
+            return "Invalid target DPI! It must be a number.", 400
+        if not target_dpi > 0:
+            return "Invalid target DPI! It must be greater than 0.", 400
+        target_dpi = min(max(target_dpi, MIN_TARGET_DPI), MAX_TARGET_DPI)
         image_order_json = request.form.get('image_order', '[]')
         image_order = json.loads(image_order_json)
 
@@ -211,18 +269,18 @@ def create_pdf_from_images():
 
         # Create a dictionary of uploaded files for easy lookup
         files_dict = {f.filename: f for f in uploaded_files}
+        stats = {'passthrough': 0, 'lossless': 0, 'transcoded': 0, 'failed': 0}
         
         # Process images in the order specified by image_order
         for filename_in_order in image_order:
             img_file = files_dict.get(filename_in_order)
             if img_file:
-                # Save the file temporarily to process it
-                temp_filename = os.path.join(app.config['UPLOAD_FOLDER'], img_file.filename)
-                img_file.save(temp_filename)
+                # Keep the upload in memory so JPEG bytes can be copied into the PDF untouched
+                image_bytes = img_file.read()
 
                 try:
-                    with Image.open(temp_filename) as pil_img:
-                        width, height = pil_img.size
+                    with Image.open(BytesIO(image_bytes)) as pil_img:
+                        width, height = oriented_size(pil_img)
                     
                     available_width = pdf.w - 2 * margin
                     available_height = pdf.h - 2 * margin
@@ -244,22 +302,43 @@ def create_pdf_from_images():
                     x_pos = (pdf.w - img_width_on_pdf) / 2
                     y_pos = (pdf.h - img_height_on_pdf) / 2
 
+                    # Largest pixel size that still fits the target DPI at the placed size
+                    max_pixels = (
+                        int(img_width_on_pdf / MM_PER_INCH * target_dpi),
+                        int(img_height_on_pdf / MM_PER_INCH * target_dpi),
+                    )
+
+                    with Image.open(BytesIO(image_bytes)) as pil_img:
+                        if is_passthrough(pil_img, max_pixels):
+                            # fpdf2 embeds raw JPEG bytes as a DCTDecode stream without decoding;
+                            # other formats are decoded and stored losslessly (FlateDecode)
+                            image_source = BytesIO(image_bytes)
+                            stats['passthrough' if pil_img.format == 'JPEG' else 'lossless'] += 1
+                        else:
+                            image_source = transcode_image(pil_img, max_pixels)
+                            stats['transcoded'] += 1
+
                     pdf.add_page()
-                    pdf.image(temp_filename, x=x_pos, y=y_pos, w=img_width_on_pdf, h=img_height_on_pdf)
+                    pdf.image(image_source, x=x_pos, y=y_pos, w=img_width_on_pdf, h=img_height_on_pdf)
                 except Exception as e:
-                    print(f"Error processing image {temp_filename}: {e}")
-                finally:
-                    if os.path.exists(temp_filename): # Clean up uploaded image
-                        os.remove(temp_filename)
+                    stats['failed'] += 1
+                    print(f"Error processing image {img_file.filename}: {e}")
             else:
                 print(f"Warning: Image {filename_in_order} not found in uploaded files.")
 
-        pdf_output_path = os.path.join(app.config['UPLOAD_FOLDER'], 'output.pdf')
+        print(f"Image stats: {stats['passthrough']} passed through, {stats['lossless']} stored losslessly, "
+              f"{stats['transcoded']} transcoded, {stats['failed']} failed")
+
+        pdf_output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"output_{secrets.token_hex(8)}.pdf")
         pdf.output(pdf_output_path, 'F')
         
         # Send the file and then attempt to clean it up
         try:
-            return send_file(pdf_output_path, as_attachment=True, download_name='created_pdf.pdf')
+            response = send_file(pdf_output_path, as_attachment=True, download_name='created_pdf.pdf')
+            response.headers['X-Images-Passthrough'] = str(stats['passthrough'])
+            response.headers['X-Images-Lossless'] = str(stats['lossless'])
+            response.headers['X-Images-Transcoded'] = str(stats['transcoded'])
+            return response
         finally:
             if os.path.exists(pdf_output_path):
                 try:
@@ -0,0 +1,296 @@
+"""Load-test harness for the PDF app.
+
+Starts the Flask app on a local WSGI server (pre-forked worker processes,
+each with a fixed-size thread pool, sharing one listening socket) and
+replays a mix of compression and creation requests at a fixed rate.
+
+Usage:
+    python loadtest.py --workers 2 --threads 4 --rate 5 --duration 30
+    python loadtest.py --workers 1 --threads 8 --compress-ratio 0.2 --json results.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from PIL import Image
+from fpdf import FPDF
+
+from app import app
+
+
+# --- Server side ---
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI server that serves an already-bound socket from a fixed-size thread pool."""
+
+    def __init__(self, sock, wsgi_app, threads):
+        super().__init__(sock.getsockname(), QuietHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.setup_environ()
+        self.set_app(wsgi_app)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _serve(sock, threads):
+    # Silence the app's per-image prints so they don't drown the report
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        PooledWSGIServer(sock, app, threads).serve_forever()
+
+
+def start_server(workers, threads, host='127.0.0.1', port=0):
+    """Bind a socket and start `workers` processes serving it. Returns (port, stop)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+
+    if workers <= 1:
+        server = PooledWSGIServer(sock, app, threads)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.pool.shutdown(wait=True)
+            sock.close()
+    else:
+        ctx = multiprocessing.get_context('fork')
+        processes = [ctx.Process(target=_serve, args=(sock, threads), daemon=True) for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+        def stop():
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+            sock.close()
+
+    return sock.getsockname()[1], stop
+
+
+# --- Payloads ---
+def make_jpeg(width=1600, height=1200, seed=0):
+    rng = random.Random(seed)
+    image = Image.new('RGB', (width, height))
+    # Blocky noise compresses like a photo rather than a flat colour
+    for x in range(0, width, 40):
+        for y in range(0, height, 40):
+            colour = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            image.paste(colour, (x, y, x + 40, y + 40))
+    output = BytesIO()
+    image.save(output, format='JPEG', quality=92)
+    return output.getvalue()
+
+
+def make_png(width=800, height=600):
+    image = Image.new('RGBA', (width, height), (30, 120, 200, 128))
+    output = BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+
+def make_pdf(jpeg_bytes, pages=3):
+    pdf = FPDF(unit='mm', format='A4')
+    for _ in range(pages):
+        pdf.add_page()
+        pdf.image(BytesIO(jpeg_bytes), x=10, y=10, w=190)
+    return bytes(pdf.output())
+
+
+def encode_multipart(fields, files):
+    """Encode form fields and (field, filename, bytes, content_type) files as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    body = BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, data, content_type in files:
+        body.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode()
+        )
+        body.write(data)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def build_requests():
+    """Return a dict of request kind -> callable producing (path, body, content_type)."""
+    jpeg = make_jpeg()
+    png = make_png()
+    pdf_bytes = make_pdf(jpeg)
+
+    def compress_request():
+        level = random.choice(['low', 'medium', 'high'])
+        return ('/pdfcompress',) + encode_multipart(
+            {'compression_level': level},
+            [('pdf_file', f'load_{uuid.uuid4().hex}.pdf', pdf_bytes, 'application/pdf')],
+        )
+
+    def create_request():
+        return ('/create_pdf_from_images',) + encode_multipart(
+            {
+                'orientation': 'P',
+                'page_size': 'A4',
+                'margin': '10',
+                'image_order': json.dumps(['photo.jpg', 'overlay.png']),
+            },
+            [
+                ('images', 'photo.jpg', jpeg, 'image/jpeg'),
+                ('images', 'overlay.png', png, 'image/png'),
+            ],
+        )
+
+    return {'compress': compress_request, 'create': create_request}
+
+
+# --- Client side ---
+def send(port, path, body, content_type, timeout):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('POST', path, body=body, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    """Aggregate (kind, latency, ok) tuples into per-kind and total statistics."""
+    groups = {'total': results}
+    for row in results:
+        groups.setdefault(row[0], []).append(row)
+
+    summary = {}
+    for kind, rows in groups.items():
+        latencies = sorted(latency for _, latency, _ in rows)
+        errors = sum(1 for _, _, ok in rows if not ok)
+        summary[kind] = {
+            'requests': len(rows),
+            'errors': errors,
+            'error_rate': errors / len(rows) if rows else 0.0,
+            'throughput_rps': (len(rows) - errors) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p90_ms': percentile(latencies, 90) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        }
+    return summary
+
+
+def run_load(port, rate, duration, compress_ratio, clients, timeout=60, seed=0):
+    """Fire requests at a fixed rate (open loop) and return (results, elapsed)."""
+    random.seed(seed)
+    builders = build_requests()
+    results = []
+    lock = threading.Lock()
+
+    def fire(kind, scheduled):
+        path, body, content_type = builders[kind]()
+        try:
+            ok = send(port, path, body, content_type, timeout) == 200
+        except Exception:
+            ok = False
+        # Measured from the scheduled start so queueing delay on the client counts too
+        latency = time.perf_counter() - scheduled
+        with lock:
+            results.append((kind, latency, ok))
+
+    total = int(rate * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = 'compress' if random.random() < compress_ratio else 'create'
+            executor.submit(fire, kind, scheduled)
+    return results, time.perf_counter() - start
+
+
+def print_report(summary, config):
+    print(f"workers={config['workers']} threads={config['threads']} "
+          f"rate={config['rate']}/s duration={config['duration']}s")
+    print(f"{'kind':<10}{'reqs':>7}{'errors':>8}{'err%':>7}{'rps':>8}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for kind, row in summary.items():
+        print(f"{kind:<10}{row['requests']:>7}{row['errors']:>8}{row['error_rate'] * 100:>6.1f}%"
+              f"{row['throughput_rps']:>8.2f}{row['p50_ms']:>9.0f}{row['p90_ms']:>9.0f}"
+              f"{row['p99_ms']:>9.0f}{row['max_ms']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the PDF app on a local WSGI server.')
+    parser.add_argument('--workers', type=int, default=1, help='server processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per server process')
+    parser.add_argument('--rate', type=float, default=5.0, help='requests per second')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds to send requests for')
+    parser.add_argument('--compress-ratio', type=float, default=0.5,
+                        help='fraction of requests that hit /pdfcompress (rest hit /create_pdf_from_images)')
+    parser.add_argument('--clients', type=int, default=64, help='max in-flight client requests')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the summary to this file as JSON')
+    args = parser.parse_args()
+
+    app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp(prefix='pdf_loadtest_')
+    app.config['DEBUG'] = False
+
+    port, stop = start_server(args.workers, args.threads)
+    try:
+        results, elapsed = run_load(port, args.rate, args.duration, args.compress_ratio,
+                                    args.clients, seed=args.seed)
+    finally:
+        stop()
+        shutil.rmtree(app.config['UPLOAD_FOLDER'], ignore_errors=True)
+
+    config = {key: getattr(args, key) for key in ('workers', 'threads', 'rate', 'duration', 'compress_ratio')}
+    summary = summarize(results, elapsed)
+    print_report(summary, config)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': config, 'elapsed_s': elapsed, 'summary': summary}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Offline throughput benchmark for the fetcher, driven against mock_server.py.
+
+    python benchmark.py --videos 2000 --concurrency 1 4 16 32 --latency-ms 50
+    python benchmark.py --error-rate 0.05 --rate-limit 200 --json bench.json
+
+Each concurrency level runs in a fresh temporary directory and reports
+videos/s, thumbnails/s, per-stage latency and retries.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+
+from fetch_you import API_PATH, ThumbnailFetcher
+from mock_server import MockConfig, MockYouTubeServer
+from scheduler import QuotaScheduler
+
+ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+
+def synthetic_ids(count):
+    """Distinct, valid-looking 11-character video IDs."""
+    ids = []
+    for n in range(count):
+        chars = []
+        for _ in range(11):
+            n, digit = divmod(n, len(ID_ALPHABET))
+            chars.append(ID_ALPHABET[digit])
+        ids.append(''.join(reversed(chars)))
+    return ids
+
+def run_once(base_url, video_ids, workers, sizes=()):
+    workdir = tempfile.mkdtemp(prefix='fetch_bench_')
+    try:
+        fetcher = ThumbnailFetcher(
+            'benchmark',
+            api_url=base_url + API_PATH,
+            workers=workers,
+            # API and thumbnails share one mock host, so let it use every worker
+            per_host=workers,
+            thumb_dir=os.path.join(workdir, 'thumbnails'),
+            output_path=os.path.join(workdir, 'video_data.csv'),
+            scheduler=QuotaScheduler(daily_budget=10 ** 9, base_delay=0.05, max_delay=1.0),
+            sizes=sizes,
+        )
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+            fetcher.run(video_ids)
+        snapshot = fetcher.metrics.snapshot()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    elapsed = snapshot['elapsed_s']
+    counters = snapshot['counters']
+    stages = snapshot['stages']
+    thumbnails = sum(n for name, n in counters.items() if name.startswith('thumbnails.'))
+    return {
+        'workers': workers,
+        'elapsed_s': elapsed,
+        'videos': fetcher.videos_fetched,
+        'videos_per_s': fetcher.videos_fetched / elapsed if elapsed else 0.0,
+        'thumbnails_per_s': thumbnails / elapsed if elapsed else 0.0,
+        'retries': fetcher.scheduler.retries,
+        'metadata_p50_ms': stages.get('metadata', {}).get('p50_ms', 0.0),
+        'download_p50_ms': stages.get('download', {}).get('p50_ms', 0.0),
+        'disk_write_p50_ms': stages.get('disk_write', {}).get('p50_ms', 0.0),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetcher against a local mock API.")
+    parser.add_argument("--videos", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[], help="also benchmark resizing to these widths")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+    server = MockYouTubeServer(config=config).start()
+    video_ids = synthetic_ids(args.videos)
+    results = []
+    try:
+        print(f"{'workers':>8}{'videos/s':>10}{'thumbs/s':>10}{'retries':>9}"
+              f"{'meta p50':>10}{'dl p50':>9}{'disk p50':>10}")
+        for workers in args.concurrency:
+            result = run_once(server.base_url, video_ids, workers, args.sizes)
+            results.append(result)
+            print(f"{workers:>8}{result['videos_per_s']:>10.1f}{result['thumbnails_per_s']:>10.1f}"
+                  f"{result['retries']:>9}{result['metadata_p50_ms']:>10.0f}{result['download_p50_ms']:>9.0f}"
+                  f"{result['disk_write_p50_ms']:>10.0f}")
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
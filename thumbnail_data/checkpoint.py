@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+from itertools import islice
+
+class CheckpointStore:
+    """SQLite record of which video IDs have metadata and which have thumbnails.
+
+    A rerun after a crash asks the store for pending work, so completed API
+    calls and downloads are never repeated.
+    """
+
+    def __init__(self, path="checkpoint.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps per-download commits cheap and safe to interrupt
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                thumbnail_url TEXT,
+                metadata_done INTEGER NOT NULL DEFAULT 0,
+                thumbnail_done INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._conn.commit()
+
+    def pending_metadata(self, video_ids, chunk_size=500):
+        """Lazily yield the IDs from video_ids whose metadata has not been fetched yet.
+
+        The input is checked against the index a chunk at a time, so it can be
+        a stream of any length.
+        """
+        iterator = iter(video_ids)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                done = {row[0] for row in self._conn.execute(
+                    f"SELECT video_id FROM videos WHERE metadata_done = 1 AND video_id IN ({placeholders})",
+                    chunk,
+                )}
+            for video_id in chunk:
+                if video_id not in done:
+                    yield video_id
+
+    def known_ids(self, page_size=1000):
+        """Lazily yield every ID the API returned metadata for, in ID order."""
+        for video_id, _ in self.known_thumbnails(page_size):
+            yield video_id
+
+    def known_thumbnails(self, page_size=1000):
+        """Lazily yield (video_id, thumbnail_url) for every ID with metadata, in ID order."""
+        last = ""
+        while True:
+            with self._lock:
+                page = self._conn.execute(
+                    "SELECT video_id, thumbnail_url FROM videos WHERE metadata_done = 1 "
+                    "AND thumbnail_url IS NOT NULL AND video_id > ? ORDER BY video_id LIMIT ?",
+                    (last, page_size),
+                ).fetchall()
+            if not page:
+                return
+            yield from page
+            last = page[-1][0]
+
+    def pending_thumbnails(self):
+        """Return (video_id, thumbnail_url) pairs with metadata saved but no thumbnail yet."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT video_id, thumbnail_url FROM videos "
+                "WHERE metadata_done = 1 AND thumbnail_done = 0 AND thumbnail_url IS NOT NULL"
+            ).fetchall()
+
+    def mark_metadata(self, batch, thumbnail_urls):
+        """Mark a whole requested batch as done.
+
+        IDs the API did not return (deleted or private videos) have no entry in
+        thumbnail_urls and are recorded without one, so they are not retried.
+        """
+        rows = [(video_id, thumbnail_urls.get(video_id)) for video_id in batch]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO videos (video_id, thumbnail_url, metadata_done) VALUES (?, ?, 1) "
+                "ON CONFLICT(video_id) DO UPDATE SET "
+                "thumbnail_url = excluded.thumbnail_url, metadata_done = 1",
+                rows,
+            )
+
+    def mark_thumbnail(self, video_id):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE videos SET thumbnail_done = 1 WHERE video_id = ?", (video_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
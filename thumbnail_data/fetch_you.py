@@ -1,58 +1,521 @@
+"""Fetch YouTube video metadata and thumbnails for a list of URLs.
+
+Library use:
+    from fetch_you import ThumbnailFetcher, iter_video_ids
+    ThumbnailFetcher(api_key).run(iter_video_ids("youtube_urls.txt"))
+
+Command line:
+    python fetch_you.py --api-key KEY --input youtube_urls.txt --workers 16
+    python fetch_you.py --shard-index 0 --shard-count 4 --output video_data_0.csv
+    python fetch_you.py --refresh            # statistics only, for IDs fetched before
+    python fetch_you.py --revalidate         # conditional GETs for thumbnails fetched before
+    python fetch_you.py --base-url http://127.0.0.1:8000   # point at a local mock API
+"""
+import argparse
+import multiprocessing
 import requests
 import os
 import re
+import base64
+import zlib
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
 from urllib.parse import urlparse, parse_qs
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from checkpoint import CheckpointStore
+from sinks import STATS_FIELDS, open_sink
+from thumbcache import ThumbnailCache
+from resize import UnreadableImage, resize_thumbnail
+from metrics import Metrics
+from scheduler import DAILY_QUOTA, QuotaExhausted, QuotaScheduler, VIDEOS_LIST_COST
 
-API_KEY = 'YOUR_API_KEY_HERE'  # 🔴 Replace with your API key
+BASE_URL = 'https://www.googleapis.com'
+API_PATH = '/youtube/v3/videos'
+API_URL = BASE_URL + API_PATH
 BATCH_SIZE = 50  # max allowed by YouTube API
+MAX_WORKERS = 16  # total requests in flight (metadata + thumbnails)
+MAX_PER_HOST = 8  # requests in flight to any single host
+REQUEST_TIMEOUT = 30
+# Smallest to largest; a missing resolution falls back to the next smaller, then larger one
+THUMBNAIL_RESOLUTIONS = ('default', 'medium', 'high', 'standard', 'maxres')
+PENDING_PER_WORKER = 4  # queued tasks per worker before the input stream is paused
 
 # --- Helper to extract video ID from URL ---
+VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+PATH_PREFIXES = ('shorts', 'embed', 'live', 'v', 'e')
+
 def extract_video_id(url):
     parsed = urlparse(url)
-    if 'youtube' in parsed.netloc:
+    video_id = None
+    if 'youtu.be' in parsed.netloc:
+        video_id = parsed.path.strip('/').split('/')[0]
+    elif 'youtube' in parsed.netloc:
         qs = parse_qs(parsed.query)
-        return qs.get('v', [None])[0]
-    elif 'youtu.be' in parsed.netloc:
-        return parsed.path.strip('/')
+        video_id = qs.get('v', [None])[0]
+        parts = parsed.path.strip('/').split('/')
+        # /shorts/<id>, /embed/<id>, /live/<id>, /v/<id>
+        if not video_id and len(parts) >= 2 and parts[0] in PATH_PREFIXES:
+            video_id = parts[1]
+    if video_id and VIDEO_ID_RE.match(video_id):
+        return video_id
+    return None
+
+def _id_key(video_id):
+    """Pack an 11-character ID losslessly into an integer (smaller than the str in a set)."""
+    # Padding with 'A' (zero bits) keeps all 66 bits; '=' padding would drop the last two
+    return int.from_bytes(base64.urlsafe_b64decode(video_id + 'A'), 'big')
+
+def iter_video_ids(path):
+    """Lazily yield unique video IDs from a file with one URL per line."""
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            video_id = extract_video_id(line)
+            if not video_id:
+                continue
+            key = _id_key(video_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield video_id
+
+def select_thumbnail(thumbnails, preferred='high'):
+    """Return the URL of the preferred resolution, or the nearest one available."""
+    index = THUMBNAIL_RESOLUTIONS.index(preferred)
+    fallbacks = THUMBNAIL_RESOLUTIONS[index::-1] + THUMBNAIL_RESOLUTIONS[index + 1:]
+    for resolution in fallbacks:
+        if resolution in thumbnails:
+            return thumbnails[resolution]['url']
     return None
 
-# --- Load video URLs and extract IDs ---
-video_ids = []
-with open("youtube_urls.txt") as f:
-    for line in f:
-        line = line.strip()
-        if not line: continue
-        video_id = extract_video_id(line)
-        if video_id:
-            video_ids.append(video_id)
+def in_shard(video_id, shard_index, shard_count):
+    """Stable shard assignment, identical on every machine and Python version."""
+    return zlib.crc32(video_id.encode()) % shard_count == shard_index
 
-# --- Setup folders ---
-os.makedirs("thumbnails", exist_ok=True)
+def shard_filter(video_ids, shard_index=0, shard_count=1):
+    if shard_count == 1:
+        return iter(video_ids)
+    return (video_id for video_id in video_ids if in_shard(video_id, shard_index, shard_count))
 
 # --- Batch processing ---
-def chunks(lst, size):
-    for i in range(0, len(lst), size):
-        yield lst[i:i + size]
+def chunks(iterable, size):
+    """Yield lists of up to `size` items as they fill, without materializing the input."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class BoundedSubmitter:
+    """Submits tasks to an executor, blocking once `limit` of them are still pending.
+
+    Keeps the task queue (and memory) bounded however large the input is.
+    The first task exception is re-raised from join().
+    """
+
+    def __init__(self, executor, limit, progress=None):
+        self.executor = executor
+        self.progress = progress
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = []
+
+    def submit(self, fn, *args):
+        self._slots.acquire()
+        future = self.executor.submit(fn, *args)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future.exception() is not None:
+                self._errors.append(future.exception())
+        self._slots.release()
+        if self.progress is not None:
+            self.progress.update()
+
+    def join(self):
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            wait(pending)
+        if self._errors:
+            raise self._errors[0]
+
+# --- Shared HTTP plumbing ---
+def make_session(pool_size=MAX_PER_HOST):
+    """Session with a keep-alive pool large enough for every concurrent request to one host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class HostLimiter:
+    """Caps the number of concurrent requests per host."""
+
+    def __init__(self, per_host=MAX_PER_HOST):
+        self.per_host = per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    def slot(self, url):
+        """Context manager holding one of the host's request slots."""
+        return self._semaphore(url)
+
+class ThumbnailFetcher:
+    """Fetches metadata batches and thumbnails concurrently over one pooled session.
+
+    Thumbnail downloads for a batch are queued as soon as its metadata arrives,
+    so they overlap with the metadata calls still in flight. With a checkpoint
+    store, IDs already fetched are skipped and unfinished downloads resumed;
+    revalidate_thumbnails() re-checks the stored ones with conditional GETs.
+    Every request goes through the quota scheduler for pacing and retries.
+    Images go into a content-addressed store, so identical thumbnails are kept
+    once. With `sizes`, downloads are resized to those widths in a process
+    pool, and `keep_original=False` drops the full-size image. Per-stage
+    counters and latencies are collected in `metrics` and, with `stats_path`,
+    written out as JSON at the end of a run.
+    """
+
+    def __init__(self, api_key, api_url=API_URL, workers=MAX_WORKERS, per_host=MAX_PER_HOST,
+                 thumb_dir="thumbnails", output_path="video_data.csv", checkpoint=None,
+                 scheduler=None, resolution='high', sizes=(), keep_original=True, stats_path=None):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.workers = workers
+        self.thumb_dir = thumb_dir
+        self.output_path = output_path
+        self.resolution = resolution
+        self.sizes = tuple(sizes)
+        self.keep_original = keep_original
+        self.sink = None
+        self.cache = None
+        self.resizer = None
+        self.session = make_session(per_host)
+        self.limiter = HostLimiter(per_host)
+        self.checkpoint = checkpoint
+        self.scheduler = scheduler or QuotaScheduler()
+        self.stats_path = stats_path
+        self.metrics = Metrics()
+        self.videos_fetched = 0
+
+    def get(self, stage, url, **kwargs):
+        """One timed GET attempt; waiting for a host slot is not counted as latency."""
+        with self.limiter.slot(url):
+            with self.metrics.time(stage):
+                response = self.session.get(url, timeout=REQUEST_TIMEOUT, **kwargs)
+        self.metrics.incr(f"{stage}.status.{response.status_code}")
+        if response.status_code >= 400:
+            self.metrics.incr(f"{stage}.errors")
+        self.metrics.incr(f"{stage}.bytes", len(response.content))
+        return response
+
+    def fetch_metadata(self, batch, part='snippet,statistics'):
+        params = {'part': part, 'id': ",".join(batch), 'key': self.api_key}
+        response = self.scheduler.request(
+            lambda: self.get('metadata', self.api_url, params=params),
+            units=VIDEOS_LIST_COST,
+        )
+        response.raise_for_status()
+        return response.json().get('items', [])
 
-for batch in tqdm(list(chunks(video_ids, BATCH_SIZE)), desc="Fetching video data"):
-    ids = ",".join(batch)
-    url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet,statistics&id={ids}&key={API_KEY}"
-    response = requests.get(url)
-    data = response.json()
+    def download_thumbnail(self, video_id, thumbnail_url):
+        # Conditional GET: unchanged thumbnails come back as 304 with no body
+        validators = self.cache.validators(video_id)
+        headers = self.cache.conditional_headers(validators)
+        try:
+            response = self.scheduler.request(
+                lambda: self.get('download', thumbnail_url, headers=headers)
+            )
+        except (requests.HTTPError, requests.ConnectionError, requests.Timeout):
+            # Out of retries: skip it this run and leave it pending for the next
+            self.metrics.incr("thumbnails.failed")
+            return 'failed'
+        if response.status_code >= 400:
+            # A missing thumbnail won't appear on a retry
+            return self.skip_thumbnail(video_id)
+        try:
+            with self.metrics.time('disk_write'):
+                status = self.cache.store(video_id, response, validators, resize=self.resize)
+        except UnreadableImage:
+            # Neither will a body that can't be decoded
+            return self.skip_thumbnail(video_id)
+        self.metrics.incr(f"thumbnails.{status}")
+        if self.checkpoint:
+            self.checkpoint.mark_thumbnail(video_id)
+        return status
 
-    for item in data.get('items', []):
+    def skip_thumbnail(self, video_id):
+        """Count a thumbnail that can't be fetched and record it as done."""
+        self.metrics.incr("thumbnails.failed")
+        if self.checkpoint:
+            self.checkpoint.mark_thumbnail(video_id)
+        return 'failed'
+
+    def resize(self, data, widths):
+        # CPU-bound, so it runs in the process pool while this thread waits
+        return self.resizer.submit(resize_thumbnail, data, widths).result()
+
+    def save_metadata(self, item):
         video_id = item['id']
         title = item['snippet']['title']
-        thumbnail_url = item['snippet']['thumbnails']['high']['url']
+        thumbnail_url = select_thumbnail(item['snippet']['thumbnails'], self.resolution)
         view_count = item['statistics'].get('viewCount', 'N/A')
         like_count = item['statistics'].get('likeCount', 'Hidden')
+        self.sink.write({
+            'video_id': video_id,
+            'title': title,
+            'thumbnail_url': thumbnail_url,
+            'view_count': view_count,
+            'like_count': like_count,
+        })
+        return video_id, thumbnail_url
+
+    def handle_batch(self, batch, items, downloads):
+        thumbnail_urls = {}
+        for item in items:
+            video_id, thumbnail_url = self.save_metadata(item)
+            thumbnail_urls[video_id] = thumbnail_url
+        # Rows are on disk before the batch is marked, so a crash can't lose metadata
+        if self.checkpoint:
+            self.sink.flush()
+            self.checkpoint.mark_metadata(batch, thumbnail_urls)
+        self.videos_fetched += len(items)
+        for video_id, thumbnail_url in thumbnail_urls.items():
+            if thumbnail_url:
+                downloads.submit(self.download_thumbnail, video_id, thumbnail_url)
+
+    def stream_batches(self, executor, video_ids, part, handle, progress):
+        """Fetch `part` for video_ids in batches, passing each result to handle(batch, items).
+
+        Keeps at most `workers` calls in flight. Returns True if the quota ran out.
+        """
+        exhausted = False
+        in_flight = {}
+
+        def collect(future, batch):
+            nonlocal exhausted
+            try:
+                items = future.result()
+            except QuotaExhausted:
+                exhausted = True
+            else:
+                handle(batch, items)
+            progress.update()
+
+        for batch in chunks(video_ids, BATCH_SIZE):
+            in_flight[executor.submit(self.fetch_metadata, batch, part)] = batch
+            if len(in_flight) >= self.workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, in_flight.pop(future))
+                if exhausted:
+                    break
+        for future in as_completed(in_flight):
+            collect(future, in_flight[future])
+        return exhausted
+
+    def run(self, video_ids):
+        """Fetch metadata and thumbnails for an iterable of video IDs.
+
+        The input is consumed lazily in batches of BATCH_SIZE, with a bounded
+        number of metadata calls and downloads in flight.
+        """
+        self.open_cache()
+        if self.checkpoint:
+            video_ids = self.checkpoint.pending_metadata(video_ids)
+        window = self.workers * PENDING_PER_WORKER
+        started = time.perf_counter()
+
+        try:
+            self.sink = open_sink(self.output_path, flush_every=BATCH_SIZE)
+            with self.sink, ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                    tqdm(desc="Fetching video data", unit="batch", position=0) as batch_progress, \
+                    tqdm(desc="Downloading thumbnails", unit="img", position=1) as thumb_progress:
+                downloads = BoundedSubmitter(executor, window, progress=thumb_progress)
+                if self.checkpoint:
+                    for video_id, thumbnail_url in self.checkpoint.pending_thumbnails():
+                        downloads.submit(self.download_thumbnail, video_id, thumbnail_url)
+
+                exhausted = self.stream_batches(
+                    executor, video_ids, 'snippet,statistics',
+                    lambda batch, items: self.handle_batch(batch, items, downloads),
+                    batch_progress,
+                )
+                downloads.join()
+        finally:
+            self.close_cache()
+        self.print_thumbnail_summary()
+        self.print_report(started, exhausted)
+
+    def revalidate_thumbnails(self, thumbnails):
+        """Re-request (video_id, thumbnail_url) pairs with their stored validators.
+
+        Unchanged thumbnails come back as 304 with no body. No metadata calls
+        are made and the metadata file is left alone.
+        """
+        self.open_cache()
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                    tqdm(desc="Revalidating thumbnails", unit="img") as progress:
+                downloads = BoundedSubmitter(executor, self.workers * PENDING_PER_WORKER, progress=progress)
+                for video_id, thumbnail_url in thumbnails:
+                    downloads.submit(self.download_thumbnail, video_id, thumbnail_url)
+                downloads.join()
+        finally:
+            self.close_cache()
+        self.print_thumbnail_summary()
+        self.print_report(started, False)
+
+    def open_cache(self):
+        self.cache = ThumbnailCache(self.thumb_dir, self.sizes, self.keep_original)
+        if self.sizes:
+            # forkserver, not fork: forking a process that runs download threads can
+            # copy a lock another thread holds into the child
+            self.resizer = ProcessPoolExecutor(mp_context=multiprocessing.get_context('forkserver'))
+
+    def close_cache(self):
+        self.cache.close()
+        if self.resizer:
+            self.resizer.shutdown()
+            self.resizer = None
+
+    def print_thumbnail_summary(self):
+        counters = self.metrics.counters
+        print(f"Thumbnails: {counters['thumbnails.written']} written, "
+              f"{counters['thumbnails.deduplicated']} deduplicated, {counters['thumbnails.unchanged']} unchanged, "
+              f"{counters['thumbnails.not_modified']} not modified, {counters['thumbnails.failed']} failed")
+
+    def refresh_statistics(self, video_ids, output_path="video_stats.csv"):
+        """Append a statistics snapshot for already-known video IDs.
+
+        Only `part=statistics` is requested and rows are appended as a time
+        series; the metadata file, checkpoint and thumbnails are left alone.
+        """
+        started = time.perf_counter()
+        with open_sink(output_path, flush_every=BATCH_SIZE, fields=STATS_FIELDS) as sink, \
+                ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                tqdm(desc="Refreshing statistics", unit="batch") as progress:
+
+            def handle(batch, items):
+                fetched_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+                for item in items:
+                    statistics = item.get('statistics', {})
+                    sink.write({
+                        'fetched_at': fetched_at,
+                        'video_id': item['id'],
+                        'view_count': statistics.get('viewCount', 'N/A'),
+                        'like_count': statistics.get('likeCount', 'Hidden'),
+                        'comment_count': statistics.get('commentCount', 'N/A'),
+                    })
+                self.videos_fetched += len(items)
+
+            exhausted = self.stream_batches(executor, video_ids, 'statistics', handle, progress)
+        self.print_report(started, exhausted)
+
+    def print_report(self, started, exhausted):
+        if exhausted:
+            print("Quota exhausted; rerun after the daily reset to continue where this run stopped.")
+        report = self.scheduler.report(time.perf_counter() - started, self.videos_fetched)
+        print(f"Metadata: {report['videos']} videos in {report['elapsed_s']:.1f}s "
+              f"({report['videos_per_s']:.1f} videos/s), {report['calls']} calls, {report['retries']} retries; "
+              f"quota spent {report['quota_spent']}, left {report['quota_left']}")
+        print(self.metrics.summary())
+        if self.stats_path:
+            self.metrics.write_json(self.stats_path, extra={'quota': report, 'exhausted': exhausted})
+
+# --- Command line ---
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch YouTube metadata and thumbnails for a list of URLs.")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"),
+                        help="YouTube Data API key (default: $YOUTUBE_API_KEY)")
+    parser.add_argument("--input", default="youtube_urls.txt", help="file with one video URL per line")
+    parser.add_argument("--output", default="video_data.csv", help="metadata file (.csv or .jsonl)")
+    parser.add_argument("--stats-output", default="video_stats.csv", help="time-series file for --refresh")
+    parser.add_argument("--thumb-dir", default="thumbnails")
+    parser.add_argument("--checkpoint", default="checkpoint.db")
+    parser.add_argument("--quota-state", default="quota.json")
+    parser.add_argument("--run-stats", default=None, help="write run metrics as JSON to this file")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="concurrent requests in total")
+    parser.add_argument("--per-host", type=int, default=MAX_PER_HOST, help="concurrent requests per host")
+    parser.add_argument("--shard-index", type=int, default=0)
+    parser.add_argument("--shard-count", type=int, default=1,
+                        help="split IDs across machines; give each shard its own output paths")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL, e.g. a local mock server")
+    parser.add_argument("--daily-quota", type=int, default=DAILY_QUOTA)
+    parser.add_argument("--max-qps", type=float, default=None, help="cap on metadata calls per second")
+    parser.add_argument("--resolution", choices=THUMBNAIL_RESOLUTIONS, default="high")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[], help="also store resized copies at these widths")
+    parser.add_argument("--no-original", action="store_true", help="keep only the resized copies")
+    parser.add_argument("--refresh", action="store_true",
+                        help="only fetch statistics for IDs already in the checkpoint")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="only re-check thumbnails already in the checkpoint with conditional GETs")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or $YOUTUBE_API_KEY)")
+    if args.no_original and not args.sizes:
+        parser.error("--no-original needs --sizes, or no images are kept")
+    if args.refresh and args.revalidate:
+        parser.error("--refresh and --revalidate can't be combined")
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be in [0, --shard-count)")
+    return args
 
-        # Download thumbnail
-        thumb_data = requests.get(thumbnail_url).content
-        with open(f"thumbnails/{video_id}.jpg", "wb") as f:
-            f.write(thumb_data)
+def main(argv=None):
+    args = parse_args(argv)
+    checkpoint = CheckpointStore(args.checkpoint)
+    try:
+        scheduler = QuotaScheduler(args.daily_quota, max_qps=args.max_qps, state_path=args.quota_state)
+        fetcher = ThumbnailFetcher(
+            args.api_key,
+            api_url=args.base_url.rstrip('/') + API_PATH,
+            workers=args.workers,
+            per_host=args.per_host,
+            thumb_dir=args.thumb_dir,
+            output_path=args.output,
+            checkpoint=checkpoint,
+            scheduler=scheduler,
+            resolution=args.resolution,
+            sizes=args.sizes,
+            keep_original=not args.no_original,
+            stats_path=args.run_stats,
+        )
+        if args.refresh:
+            video_ids = shard_filter(checkpoint.known_ids(), args.shard_index, args.shard_count)
+            fetcher.refresh_statistics(video_ids, args.stats_output)
+        elif args.revalidate:
+            thumbnails = checkpoint.known_thumbnails()
+            if args.shard_count > 1:
+                thumbnails = (pair for pair in thumbnails if in_shard(pair[0], args.shard_index, args.shard_count))
+            fetcher.revalidate_thumbnails(thumbnails)
+        else:
+            video_ids = shard_filter(iter_video_ids(args.input), args.shard_index, args.shard_count)
+            fetcher.run(video_ids)
+    finally:
+        checkpoint.close()
 
-        # Save metadata
-        with open("video_data.csv", "a", encoding="utf-8") as f:
-            f.write(f'"{video_id}","{title}","{thumbnail_url}","{view_count}","{like_count}"\n')
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds (roughly 1-2-5 steps)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, float("inf"))
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are reported as bucket upper bounds."""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+            "buckets": {str(bound): n for bound, n in zip(BUCKETS_MS, self.buckets) if n},
+        }
+
+class Metrics:
+    """Thread-safe counters and per-stage latency histograms for a fetcher run.
+
+    Stages used by the fetcher are `metadata` (one API call), `download` (one
+    thumbnail GET) and `disk_write` (hashing, resizing and storing a thumbnail).
+    Each timed stage also counts `<stage>.errors` for calls that raised
+    (the fetcher adds HTTP error responses to the same counter).
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds * 1000)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.incr(f"{stage}.errors")
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            return {
+                "elapsed_s": elapsed,
+                "counters": dict(self.counters),
+                "stages": {stage: histogram.snapshot() for stage, histogram in self.histograms.items()},
+            }
+
+    def summary(self):
+        """Human-readable table of stage latencies, error rates and bytes moved."""
+        snapshot = self.snapshot()
+        elapsed = snapshot["elapsed_s"]
+        counters = snapshot["counters"]
+        lines = [f"{'stage':<12}{'count':>8}{'err%':>7}{'busy s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+        for stage, stats in snapshot["stages"].items():
+            errors = counters.get(f"{stage}.errors", 0)
+            error_rate = errors / stats["count"] * 100 if stats["count"] else 0.0
+            busy = stats["mean_ms"] * stats["count"] / 1000
+            lines.append(
+                f"{stage:<12}{stats['count']:>8}{error_rate:>6.1f}%{busy:>8.1f}{stats['p50_ms']:>9.0f}"
+                f"{stats['p90_ms']:>9.0f}{stats['p99_ms']:>9.0f}{stats['max_ms']:>9.0f}"
+            )
+        total_bytes = sum(n for name, n in counters.items() if name.endswith(".bytes"))
+        lines.append(f"{total_bytes / 1024 / 1024:.2f} MB transferred in {elapsed:.1f}s "
+                     f"({total_bytes / 1024 / 1024 / elapsed if elapsed else 0:.2f} MB/s)")
+        return "\n".join(lines)
+
+    def write_json(self, path, extra=None):
+        snapshot = self.snapshot()
+        if extra:
+            snapshot.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
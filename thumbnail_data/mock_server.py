@@ -0,0 +1,213 @@
+"""Local stand-in for the YouTube Data API and thumbnail host.
+
+Serves `/youtube/v3/videos` and `/vi/{video_id}/{resolution}.jpg` with
+configurable latency, error and rate-limit injection, so the fetcher can be
+tested and benchmarked without touching Google's servers.
+
+    python mock_server.py --port 8000 --latency-ms 80 --error-rate 0.01
+    python fetch_you.py --api-key test --base-url http://127.0.0.1:8000
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+RESOLUTIONS = {'default': (120, 90), 'medium': (320, 180), 'high': (480, 360),
+               'standard': (640, 480), 'maxres': (1280, 720)}
+
+def _make_jpeg(width, height, seed):
+    """A small real JPEG when Pillow is installed, otherwise a JPEG-looking blob."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b'\xff\xd8\xff\xe0' + hashlib.sha256(f"{seed}{width}".encode()).digest() * 64 + b'\xff\xd9'
+    rng = random.Random(seed)
+    image = Image.new('RGB', (width, height), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    output = BytesIO()
+    image.save(output, format='JPEG', quality=80)
+    return output.getvalue()
+
+class MockConfig:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=None,
+                 quota_calls=None, placeholder_rate=0.1, missing_rate=0.0, corrupt_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate  # fraction of requests answered with a 503
+        self.rate_limit = rate_limit  # requests per second before 429s, None for unlimited
+        self.quota_calls = quota_calls  # videos calls before 403 quotaExceeded, None for unlimited
+        self.placeholder_rate = placeholder_rate  # fraction of videos sharing one thumbnail
+        self.missing_rate = missing_rate  # fraction of videos whose thumbnails answer 404
+        self.corrupt_rate = corrupt_rate  # fraction of videos whose thumbnails are HTML, not images
+        self.seed = seed
+
+class MockYouTubeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), config=None):
+        super().__init__(address, MockHandler)
+        self.config = config or MockConfig()
+        self.lock = threading.Lock()
+        self.counts = {'videos': 0, 'thumbnails': 0, 'errors': 0, 'rate_limited': 0}
+        self.parts = Counter()  # videos calls by their `part` parameter
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._images = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def thumbnail(self, video_id, resolution):
+        """Deterministic thumbnail bytes, or None if missing; placeholder videos all share one image."""
+        rng = random.Random(f"{self.config.seed}:{video_id}")
+        seed = 'placeholder' if rng.random() < self.config.placeholder_rate else video_id
+        if rng.random() < self.config.missing_rate:
+            return None
+        if rng.random() < self.config.corrupt_rate:
+            return f"<html><body>No thumbnail for {video_id}</body></html>".encode()
+        key = (seed, resolution)
+        with self.lock:
+            if key not in self._images:
+                self._images[key] = _make_jpeg(*RESOLUTIONS[resolution], seed)
+            return self._images[key]
+
+    def rate_limited(self):
+        if not self.config.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count > self.config.rate_limit
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # else small responses wait ~40 ms for delayed ACKs
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, reason, headers=None):
+        body = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}}).encode()
+        self.send_body(status, body, headers=headers)
+
+    def do_GET(self):
+        server, config = self.server, self.server.config
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if server.rate_limited():
+            with server.lock:
+                server.counts['rate_limited'] += 1
+            return self.send_error_json(429, 'rateLimitExceeded', headers={'Retry-After': '1'})
+        if random.random() < config.error_rate:
+            with server.lock:
+                server.counts['errors'] += 1
+            return self.send_error_json(503, 'backendError')
+
+        url = urlparse(self.path)
+        if url.path == '/youtube/v3/videos':
+            self.handle_videos(parse_qs(url.query))
+        elif url.path.startswith('/vi/'):
+            self.handle_thumbnail(url.path)
+        else:
+            self.send_error_json(404, 'notFound')
+
+    def handle_videos(self, query):
+        server = self.server
+        part = query.get('part', ['snippet'])[0]
+        with server.lock:
+            server.counts['videos'] += 1
+            server.parts[part] += 1
+            over_quota = server.config.quota_calls is not None and server.counts['videos'] > server.config.quota_calls
+        if over_quota:
+            return self.send_error_json(403, 'quotaExceeded')
+
+        parts = part.split(',')
+        ids = query.get('id', [''])[0].split(',')
+        items = []
+        for video_id in filter(None, ids):
+            rng = random.Random(f"{server.config.seed}:{video_id}")
+            item = {'id': video_id}
+            if 'snippet' in parts:
+                item['snippet'] = {
+                    'title': f'Mock video "{video_id}", part {rng.randrange(100)}',
+                    'thumbnails': {
+                        name: {'url': f"{server.base_url}/vi/{video_id}/{name}.jpg", 'width': w, 'height': h}
+                        for name, (w, h) in RESOLUTIONS.items()
+                    },
+                }
+            if 'statistics' in parts:
+                item['statistics'] = {
+                    'viewCount': str(rng.randrange(10 ** 6) + int(time.time()) % 1000),
+                    'likeCount': str(rng.randrange(10 ** 4)),
+                    'commentCount': str(rng.randrange(10 ** 3)),
+                }
+            items.append(item)
+        self.send_body(200, json.dumps({'kind': 'youtube#videoListResponse', 'items': items}).encode())
+
+    def handle_thumbnail(self, path):
+        parts = path.strip('/').split('/')
+        resolution = parts[2].rsplit('.', 1)[0] if len(parts) == 3 else ''
+        if resolution not in RESOLUTIONS:
+            return self.send_error_json(404, 'notFound')
+        with self.server.lock:
+            self.server.counts['thumbnails'] += 1
+        data = self.server.thumbnail(parts[1], resolution)
+        if data is None:
+            return self.send_error_json(404, 'notFound')
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_body(304, b'', headers={'ETag': etag})
+        self.send_body(200, data, content_type='image/jpeg', headers={'ETag': etag})
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock YouTube Data API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests/s before answering 429")
+    parser.add_argument("--quota-calls", type=int, default=None, help="videos calls before 403 quotaExceeded")
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="fraction of thumbnails answering 404")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="fraction of thumbnails that aren't images")
+    args = parser.parse_args()
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit, args.quota_calls,
+                        missing_rate=args.missing_rate, corrupt_rate=args.corrupt_rate)
+    server = MockYouTubeServer((args.host, args.port), config)
+    print(f"Mock YouTube API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from io import BytesIO
+
+RESIZE_QUALITY = 85
+
+class UnreadableImage(Exception):
+    """The downloaded bytes could not be decoded as an image."""
+
+def resize_thumbnail(data, widths, quality=RESIZE_QUALITY):
+    """Decode a thumbnail once and return encoded JPEG bytes for each width.
+
+    Runs in a worker process; Pillow is only needed when resizing is enabled.
+    Images narrower than a requested width are re-encoded at their own size.
+    Raises UnreadableImage if the data can't be decoded.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # Let the JPEG decoder downscale by a power of two up front when it can
+            largest = max(widths)
+            if largest < image.width:
+                image.draft('RGB', (largest, largest * image.height // image.width))
+            image = image.convert('RGB')
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        # One error type the parent can catch without importing Pillow
+        raise UnreadableImage(f"{type(e).__name__}: {e}") from None
+    outputs = []
+    for width in widths:
+        resized = image
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        output = BytesIO()
+        resized.save(output, format='JPEG', quality=quality, optimize=True)
+        outputs.append(output.getvalue())
+    return outputs
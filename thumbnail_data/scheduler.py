@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")  # YouTube quotas reset at midnight Pacific
+except Exception:
+    QUOTA_TZ = timezone(timedelta(hours=-8))
+
+DAILY_QUOTA = 10000  # default YouTube Data API allocation
+VIDEOS_LIST_COST = 1  # units per videos.list call, whatever the batch size
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+class QuotaExhausted(Exception):
+    pass
+
+def _quota_day():
+    return datetime.now(QUOTA_TZ).date().isoformat()
+
+def _is_quota_error(response):
+    if response.status_code != 403:
+        return False
+    try:
+        errors = response.json()["error"]["errors"]
+    except (ValueError, KeyError, TypeError):
+        return False
+    return any(error.get("reason") in QUOTA_REASONS for error in errors)
+
+class QuotaScheduler:
+    """Spends API quota against a daily budget and retries transient failures.
+
+    Calls are paced to at most `max_qps` and refused once the day's budget is
+    used. 429/5xx responses and connection errors are retried with jittered
+    exponential backoff; a 429 pauses every thread, not just the caller.
+    With `state_path`, units spent survive across runs on the same quota day.
+    """
+
+    def __init__(self, daily_budget=DAILY_QUOTA, max_qps=None, state_path=None,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.daily_budget = daily_budget
+        self.max_qps = max_qps
+        self.state_path = state_path
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._resume_at = 0.0
+        self._day, self.spent = self._load_state()
+
+    def _load_state(self):
+        today = _quota_day()
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                # An unreadable file counts as nothing spent rather than aborting the run
+                return today, 0
+            if isinstance(state, dict) and state.get("day") == today:
+                return today, state.get("spent", 0)
+        return today, 0
+
+    def _save_state(self):
+        if self.state_path:
+            # Write then rename, so a crash mid-write never leaves truncated JSON behind
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"day": self._day, "spent": self.spent}, f)
+            os.replace(tmp_path, self.state_path)
+
+    @property
+    def remaining(self):
+        return max(0, self.daily_budget - self.spent)
+
+    def reserve(self, units):
+        """Charge `units` to today's budget, waiting for a pacing slot first."""
+        with self._lock:
+            today = _quota_day()
+            if today != self._day:
+                self._day, self.spent = today, 0
+            if self.spent + units > self.daily_budget:
+                raise QuotaExhausted(f"daily budget of {self.daily_budget} units used")
+            self.spent += units
+            self.calls += 1
+            self._save_state()
+            delay = 0.0
+            if self.max_qps:
+                now = time.monotonic()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + 1.0 / self.max_qps
+                delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def exhaust(self):
+        with self._lock:
+            self.spent = max(self.spent, self.daily_budget)
+            self._save_state()
+
+    def cooldown(self, seconds):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_cooldown(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def backoff_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(self.max_delay, float(retry_after))
+        # Full jitter keeps retrying threads from stampeding together
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def request(self, send, units=0):
+        """Call `send()` (returning a requests.Response) with quota accounting and retries."""
+        for attempt in range(self.max_retries + 1):
+            if units:
+                self.reserve(units)
+            self._wait_for_cooldown()
+            response, error = None, None
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if _is_quota_error(response):
+                    self.exhaust()
+                    raise QuotaExhausted("API reported quota exceeded")
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+
+            if attempt == self.max_retries:
+                if response is not None:
+                    response.raise_for_status()
+                raise error
+            delay = self.backoff_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                self.cooldown(delay)
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def report(self, elapsed, videos):
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "videos": videos,
+            "elapsed_s": elapsed,
+            "videos_per_s": videos / elapsed if elapsed else 0.0,
+            "quota_spent": self.spent,
+            "quota_left": self.remaining,
+        }
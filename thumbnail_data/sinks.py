@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+
+FIELDS = ["video_id", "title", "thumbnail_url", "view_count", "like_count"]
+STATS_FIELDS = ["fetched_at", "video_id", "view_count", "like_count", "comment_count"]
+
+class CsvSink:
+    """Buffered CSV writer that keeps one handle open for the whole run.
+
+    Rows are quoted by the csv module, so titles with quotes or commas
+    round-trip correctly. A header is written when the file is new.
+    """
+
+    def __init__(self, path, flush_every=50, fields=FIELDS):
+        self.path = path
+        self.flush_every = flush_every
+        self.fields = fields
+        self._buffer = []
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_ALL)
+        if is_new:
+            self._writer.writerow(fields)
+
+    def write(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._writer.writerows([[row[field] for field in self.fields] for row in self._buffer])
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class JsonlSink(CsvSink):
+    """Same buffering as CsvSink, one JSON object per line."""
+
+    def __init__(self, path, flush_every=50, fields=FIELDS):
+        self.path = path
+        self.flush_every = flush_every
+        self.fields = fields
+        self._buffer = []
+        self._file = open(path, "a", encoding="utf-8")
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+
+def open_sink(path, flush_every=50, fields=FIELDS):
+    """Pick a sink from the file extension (.jsonl, otherwise CSV)."""
+    if path.endswith(".jsonl"):
+        return JsonlSink(path, flush_every, fields)
+    return CsvSink(path, flush_every, fields)
@@ -0,0 +1,406 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import BytesIO
+
+from benchmark import synthetic_ids
+from checkpoint import CheckpointStore
+from fetch_you import (_id_key, extract_video_id, in_shard, iter_video_ids, main, parse_args,
+                       select_thumbnail, shard_filter)
+from mock_server import MockConfig, MockYouTubeServer, _make_jpeg
+from resize import resize_thumbnail
+from thumbcache import ORIGINAL, ThumbnailCache
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed for --sizes
+    Image = None
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class ExtractVideoIdTests(unittest.TestCase):
+    def test_url_forms(self):
+        urls = [
+            f'https://www.youtube.com/watch?v={VIDEO_ID}',
+            f'https://youtube.com/watch?feature=share&v={VIDEO_ID}&t=42',
+            f'https://m.youtube.com/watch?v={VIDEO_ID}',
+            f'https://youtu.be/{VIDEO_ID}',
+            f'https://youtu.be/{VIDEO_ID}?si=abc',
+            f'https://www.youtube.com/shorts/{VIDEO_ID}',
+            f'https://www.youtube.com/embed/{VIDEO_ID}',
+            f'https://www.youtube.com/live/{VIDEO_ID}?feature=share',
+            f'https://www.youtube.com/v/{VIDEO_ID}',
+            f'https://www.youtube.com/e/{VIDEO_ID}',
+        ]
+        for url in urls:
+            self.assertEqual(extract_video_id(url), VIDEO_ID, url)
+
+    def test_invalid_urls(self):
+        urls = [
+            '',
+            'not a url',
+            'https://example.com/watch?v=' + VIDEO_ID,
+            'https://www.youtube.com/watch?v=tooshort',
+            'https://www.youtube.com/watch?v=' + VIDEO_ID + 'X',
+            'https://www.youtube.com/channel/UC1234567890',
+            'https://www.youtube.com/shorts/',
+        ]
+        for url in urls:
+            self.assertIsNone(extract_video_id(url), url)
+
+    def test_id_key_keeps_last_character(self):
+        # The last character of an ID carries bits that '=' padding would drop
+        keys = {_id_key(VIDEO_ID[:-1] + c) for c in 'ABCDQRST'}
+        self.assertEqual(len(keys), 8)
+
+    def test_iter_video_ids_dedups_across_url_forms(self):
+        other = VIDEO_ID[:-1] + 'R'
+        lines = [
+            f'https://www.youtube.com/watch?v={VIDEO_ID}',
+            '',
+            'garbage',
+            f'https://youtu.be/{other}',
+            f'https://youtu.be/{VIDEO_ID}',
+            f'https://www.youtube.com/shorts/{other}',
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('\n'.join(lines) + '\n')
+        try:
+            self.assertEqual(list(iter_video_ids(f.name)), [VIDEO_ID, other])
+        finally:
+            os.remove(f.name)
+
+
+class ShardTests(unittest.TestCase):
+    def test_shards_are_disjoint_and_cover_every_id(self):
+        video_ids = synthetic_ids(2000)
+        for shard_count in (1, 2, 3, 8):
+            shards = [list(shard_filter(video_ids, index, shard_count)) for index in range(shard_count)]
+            self.assertEqual(sorted(sum(shards, [])), sorted(video_ids), shard_count)
+            for index, shard in enumerate(shards):
+                self.assertTrue(all(in_shard(video_id, index, shard_count) for video_id in shard))
+                if shard_count > 1:
+                    self.assertGreater(len(shard), len(video_ids) / shard_count / 2)
+
+    def test_assignment_is_stable(self):
+        # crc32, not hash(), so every machine and Python version agrees
+        self.assertEqual([in_shard(VIDEO_ID, index, 4) for index in range(4)].count(True), 1)
+        self.assertTrue(in_shard(VIDEO_ID, 0, 4))
+
+    def test_shard_index_must_be_in_range(self):
+        with self.assertRaises(SystemExit), open(os.devnull, 'w') as devnull, redirect_stderr(devnull):
+            parse_args(['--api-key', 'test', '--shard-index', '2', '--shard-count', '2'])
+
+
+class SelectThumbnailTests(unittest.TestCase):
+    def thumbnails(self, *names):
+        return {name: {'url': name} for name in names}
+
+    def test_preferred_resolution(self):
+        self.assertEqual(select_thumbnail(self.thumbnails('default', 'high', 'maxres')), 'high')
+        self.assertEqual(select_thumbnail(self.thumbnails('default', 'high', 'maxres'), 'maxres'), 'maxres')
+
+    def test_falls_back_to_smaller_then_larger(self):
+        self.assertEqual(select_thumbnail(self.thumbnails('default', 'medium', 'maxres')), 'medium')
+        self.assertEqual(select_thumbnail(self.thumbnails('default', 'maxres')), 'default')
+        self.assertEqual(select_thumbnail(self.thumbnails('standard', 'maxres')), 'standard')
+        self.assertEqual(select_thumbnail(self.thumbnails('medium'), 'maxres'), 'medium')
+        self.assertIsNone(select_thumbnail({}))
+
+
+class ThumbnailCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='thumbcache_test_')
+        self.cache = ThumbnailCache(self.directory, sizes=(64,))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def store(self, content=b'original', etag='"v1"'):
+        response = FakeResponse(content, headers={'ETag': etag})
+        return self.cache.store(VIDEO_ID, response, self.cache.validators(VIDEO_ID),
+                                resize=lambda data, widths: [data[:5] for _ in widths])
+
+    def test_validators_need_every_expected_width(self):
+        self.assertEqual(self.store(), 'written')
+        self.assertEqual(self.cache.validators(VIDEO_ID)['etag'], '"v1"')
+        self.assertEqual(self.cache.conditional_headers(self.cache.validators(VIDEO_ID)),
+                         {'If-None-Match': '"v1"'})
+
+        os.remove(self.cache.image_path(VIDEO_ID, 64))
+        self.assertEqual(self.cache.validators(VIDEO_ID), {})
+        self.assertEqual(self.cache.conditional_headers({}), {})
+
+        # Without validators the same content is stored again rather than skipped
+        self.assertEqual(self.store(), 'written')
+        self.assertTrue(os.path.exists(self.cache.image_path(VIDEO_ID, 64)))
+        self.assertEqual(self.store(), 'unchanged')
+
+    def test_not_modified_keeps_images(self):
+        self.store()
+        response = FakeResponse(b'', status_code=304, headers={'ETag': '"v1"'})
+        self.assertEqual(self.cache.store(VIDEO_ID, response, self.cache.validators(VIDEO_ID)), 'not_modified')
+        self.assertTrue(os.path.exists(self.cache.image_path(VIDEO_ID, ORIGINAL)))
+
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+class ResizeTests(unittest.TestCase):
+    def test_widths(self):
+        outputs = resize_thumbnail(_make_jpeg(480, 360, 'seed'), (64, 120, 1000))
+        sizes = [Image.open(BytesIO(data)).size for data in outputs]
+        # Wider than the source is re-encoded at the source size
+        self.assertEqual(sizes, [(64, 48), (120, 90), (480, 360)])
+
+
+class OptionTests(unittest.TestCase):
+    def test_no_original_needs_sizes(self):
+        with open(os.devnull, 'w') as devnull, redirect_stderr(devnull), self.assertRaises(SystemExit):
+            parse_args(['--api-key', 'test', '--no-original'])
+        args = parse_args(['--api-key', 'test', '--no-original', '--sizes', '64'])
+        self.assertEqual(args.sizes, [64])
+        with tempfile.TemporaryDirectory() as directory, self.assertRaises(ValueError):
+            ThumbnailCache(directory, sizes=(), keep_original=False)
+
+
+class FetcherTests(unittest.TestCase):
+    # Each test runs main() against a local mock server in its own directory
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='fetch_test_')
+        self.server = None
+
+    def tearDown(self):
+        if self.server:
+            self.server.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def start_server(self, **config):
+        self.server = MockYouTubeServer(config=MockConfig(**config)).start()
+        return self.server
+
+    def write_input(self, video_ids):
+        with open(self.path('urls.txt'), 'w') as f:
+            f.writelines(f'https://youtu.be/{video_id}\n' for video_id in video_ids)
+
+    def run_main(self, *extra):
+        """Run the command line quietly and return its run metrics."""
+        argv = [
+            '--api-key', 'test',
+            '--base-url', self.server.base_url,
+            '--input', self.path('urls.txt'),
+            '--output', self.path('video_data.csv'),
+            '--thumb-dir', self.path('thumbnails'),
+            '--checkpoint', self.path('checkpoint.db'),
+            '--quota-state', self.path('quota.json'),
+            '--stats-output', self.path('video_stats.csv'),
+            '--run-stats', self.path('stats.json'),
+            *extra,
+        ]
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+            main(argv)
+        with open(self.path('stats.json')) as f:
+            return json.load(f)
+
+    def read_rows(self, name='video_data.csv'):
+        with open(self.path(name), encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def pending_thumbnails(self):
+        checkpoint = CheckpointStore(self.path('checkpoint.db'))
+        try:
+            return checkpoint.pending_thumbnails()
+        finally:
+            checkpoint.close()
+
+    def test_titles_round_trip_through_csv(self):
+        # Mock titles contain both quotes and a comma
+        video_ids = synthetic_ids(60)
+        self.start_server(placeholder_rate=0.0)
+        self.write_input(video_ids)
+        self.run_main()
+        rows = self.read_rows()
+        self.assertEqual(sorted(row['video_id'] for row in rows), sorted(video_ids))
+        for row in rows:
+            self.assertTrue(row['title'].startswith(f'Mock video "{row["video_id"]}", part '), row['title'])
+
+    def test_rerun_after_checkpoint_makes_no_requests(self):
+        server = self.start_server()
+        self.write_input(synthetic_ids(120))
+        stats = self.run_main()
+        self.assertEqual(server.counts['videos'], 3)
+        self.assertEqual(server.counts['thumbnails'], 120)
+        self.assertEqual(stats['counters'].get('thumbnails.failed', 0), 0)
+
+        self.run_main()
+        self.assertEqual(server.counts['videos'], 3)
+        self.assertEqual(server.counts['thumbnails'], 120)
+        self.assertEqual(len(self.read_rows()), 120)
+
+    def test_revalidate_sends_conditional_gets_only(self):
+        server = self.start_server(placeholder_rate=0.0)
+        self.write_input(synthetic_ids(20))
+        stats = self.run_main()
+        self.assertEqual(stats['counters'].get('thumbnails.written'), 20)
+        with open(self.path('video_data.csv'), 'rb') as f:
+            metadata = f.read()
+
+        stats = self.run_main('--revalidate')
+        self.assertEqual(server.counts['videos'], 1)
+        self.assertEqual(server.counts['thumbnails'], 40)
+        self.assertEqual(stats['counters'].get('thumbnails.not_modified'), 20)
+        self.assertEqual(stats['counters'].get('download.status.304'), 20)
+        with open(self.path('video_data.csv'), 'rb') as f:
+            self.assertEqual(f.read(), metadata)
+        self.assertEqual(len(self.read_rows()), 20)
+
+    def test_refresh_appends_statistics_only(self):
+        server = self.start_server()
+        video_ids = synthetic_ids(60)
+        self.write_input(video_ids)
+        self.run_main()
+        self.assertEqual(server.parts, {'snippet,statistics': 2})
+        with open(self.path('video_data.csv'), 'rb') as f:
+            metadata = f.read()
+
+        self.run_main('--refresh')
+        self.run_main('--refresh')
+        self.assertEqual(server.parts, {'snippet,statistics': 2, 'statistics': 4})
+        self.assertEqual(server.counts['thumbnails'], 60)
+        with open(self.path('video_data.csv'), 'rb') as f:
+            self.assertEqual(f.read(), metadata)
+        rows = self.read_rows('video_stats.csv')
+        self.assertEqual(len(rows), 120)
+        self.assertEqual(sorted(row['video_id'] for row in rows), sorted(video_ids * 2))
+        for row in rows:
+            self.assertTrue(row['fetched_at'] and row['view_count'].isdigit(), row)
+
+    @unittest.skipIf(Image is None, 'Pillow is not installed')
+    def test_sizes_store_resized_copies(self):
+        self.start_server(placeholder_rate=0.0)
+        video_ids = synthetic_ids(10)
+        self.write_input(video_ids)
+        stats = self.run_main('--sizes', '64', '120', '--no-original')
+        self.assertEqual(stats['counters'].get('thumbnails.written'), 10)
+
+        cache = ThumbnailCache(self.path('thumbnails'), sizes=(64, 120), keep_original=False)
+        try:
+            for video_id in video_ids:
+                self.assertIsNone(cache.image_path(video_id, ORIGINAL))
+                for width in (64, 120):
+                    with Image.open(cache.image_path(video_id, width)) as image:
+                        self.assertEqual((image.format, image.width), ('JPEG', width))
+        finally:
+            cache.close()
+
+        # Every width is stored, so revalidating sends the ETag and gets 304s
+        stats = self.run_main('--sizes', '64', '120', '--no-original', '--revalidate')
+        self.assertEqual(stats['counters'].get('thumbnails.not_modified'), 10)
+
+    def test_shards_fetch_every_id_once(self):
+        server = self.start_server()
+        video_ids = synthetic_ids(150)
+        self.write_input(video_ids)
+        fetched = []
+        for index in range(3):
+            self.run_main('--shard-index', str(index), '--shard-count', '3',
+                          '--output', self.path(f'video_data_{index}.csv'),
+                          '--checkpoint', self.path(f'checkpoint_{index}.db'))
+            fetched += [row['video_id'] for row in self.read_rows(f'video_data_{index}.csv')]
+        self.assertEqual(sorted(fetched), sorted(video_ids))
+        self.assertEqual(server.counts['thumbnails'], 150)
+
+    def test_identical_thumbnails_are_stored_once(self):
+        server = self.start_server(placeholder_rate=0.5)
+        video_ids = synthetic_ids(40)
+        self.write_input(video_ids)
+        stats = self.run_main()
+        self.assertGreater(stats['counters'].get('thumbnails.deduplicated', 0), 0)
+
+        blobs = [name for _, _, names in os.walk(self.path('thumbnails/blobs')) for name in names]
+        expected = {video_id: hashlib.sha256(server.thumbnail(video_id, 'high')).hexdigest()
+                    for video_id in video_ids}
+        self.assertEqual(len(blobs), len(set(expected.values())))
+        self.assertLess(len(blobs), len(video_ids))
+
+        conn = sqlite3.connect(self.path('thumbnails/index.db'))
+        try:
+            rows = dict(conn.execute("SELECT video_id, sha256 FROM images WHERE width = ?", (ORIGINAL,)))
+        finally:
+            conn.close()
+        self.assertEqual(rows, expected)
+        # The mock seeds placeholder images with the name 'placeholder', so this is the shared one
+        placeholder = hashlib.sha256(server.thumbnail('placeholder', 'high')).hexdigest()
+        shared = [video_id for video_id, digest in rows.items() if digest == placeholder]
+        self.assertGreater(len(shared), 1)
+
+    def test_quota_exhausted_stops_the_run(self):
+        server = self.start_server(quota_calls=1)
+        self.write_input(synthetic_ids(150))
+        stats = self.run_main('--workers', '1', '--per-host', '1', '--daily-quota', '100')
+        self.assertTrue(stats['exhausted'])
+        self.assertEqual(server.counts['videos'], 2)
+        self.assertEqual(len(self.read_rows()), 50)
+        with open(self.path('quota.json')) as f:
+            self.assertEqual(json.load(f)['spent'], 100)
+
+        # While the budget is spent, a rerun stops before calling the API
+        self.run_main('--workers', '1', '--per-host', '1', '--daily-quota', '100')
+        self.assertEqual(server.counts['videos'], 2)
+
+        # After the daily reset the run picks up the remaining batches
+        server.config.quota_calls = None
+        os.remove(self.path('quota.json'))
+        stats = self.run_main('--workers', '1', '--per-host', '1', '--daily-quota', '100')
+        self.assertFalse(stats['exhausted'])
+        self.assertEqual(server.counts['videos'], 4)
+        self.assertEqual(len(self.read_rows()), 150)
+
+    def test_missing_thumbnails_do_not_abort_the_run(self):
+        server = self.start_server(missing_rate=0.3)
+        video_ids = synthetic_ids(100)
+        self.write_input(video_ids)
+        stats = self.run_main()
+        counters = stats['counters']
+        missing = counters.get('download.status.404', 0)
+        self.assertGreater(missing, 0)
+        self.assertEqual(counters.get('thumbnails.failed'), missing)
+        self.assertEqual(counters.get('download.errors'), missing)
+        self.assertEqual(counters.get('thumbnails.written', 0) + counters.get('thumbnails.deduplicated', 0),
+                         100 - missing)
+        self.assertEqual(len(self.read_rows()), 100)
+        # A 404 won't go away on a retry, so the rerun does not ask again
+        self.assertEqual(self.pending_thumbnails(), [])
+        self.run_main()
+        self.assertEqual(server.counts['thumbnails'], 100)
+
+    def test_undecodable_thumbnails_do_not_abort_a_resizing_run(self):
+        server = self.start_server(corrupt_rate=0.2)
+        self.write_input(synthetic_ids(20))
+        stats = self.run_main('--sizes', '64')
+        counters = stats['counters']
+        self.assertGreater(counters.get('thumbnails.failed', 0), 0)
+        self.assertEqual(counters.get('download.status.200'), 20)
+        self.assertEqual(self.pending_thumbnails(), [])
+        self.run_main('--sizes', '64')
+        self.assertEqual(server.counts['thumbnails'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+ORIGINAL = 0  # width key for the downloaded, unresized image
+
+class ThumbnailCache:
+    """Content-addressed thumbnail store with an index of HTTP validators.
+
+    Images are saved once per distinct content as
+    `thumbnails/blobs/ab/cd/{sha256}.jpg`, so shared placeholders and
+    re-uploaded art take no extra space and no directory grows past a few
+    hundred entries. `thumbnails/index.db` maps each video ID (and resized
+    width) to its blob, and keeps the ETag, Last-Modified and sha256 of the
+    last download for conditional requests.
+    """
+
+    def __init__(self, directory="thumbnails", sizes=(), keep_original=True):
+        if not keep_original and not sizes:
+            raise ValueError("keep_original=False needs at least one size, or nothing is stored")
+        self.directory = directory
+        self.sizes = tuple(sizes)
+        self.keep_original = keep_original
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS validators (
+                    video_id TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    sha256 TEXT
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS images (
+                    video_id TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    PRIMARY KEY (video_id, width)
+                )"""
+            )
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest[2:4], f"{digest}.jpg")
+
+    def image_path(self, video_id, width=ORIGINAL):
+        """Path of a video's stored image (original or resized), or None if absent."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256 FROM images WHERE video_id = ? AND width = ?", (video_id, width)
+            ).fetchone()
+        return self.blob_path(row[0]) if row else None
+
+    def expected_widths(self):
+        return ([ORIGINAL] if self.keep_original else []) + list(self.sizes)
+
+    def validators(self, video_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, sha256 FROM validators WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if row is None:
+            return {}
+        # Validators only count if every expected image is stored
+        for width in self.expected_widths():
+            path = self.image_path(video_id, width)
+            if path is None or not os.path.exists(path):
+                return {}
+        return {"etag": row[0], "last_modified": row[1], "sha256": row[2]}
+
+    def conditional_headers(self, validators):
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def put_blob(self, data):
+        """Store bytes under their hash. Returns (digest, True if the blob was new)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, data)
+        return digest, True
+
+    def store(self, video_id, response, validators, resize=None):
+        """Save a thumbnail response.
+
+        Returns 'not_modified', 'unchanged', 'deduplicated' (content already
+        stored for another video) or 'written'. `resize(data, widths)` returns
+        encoded JPEG bytes for each width when sizes are configured.
+        """
+        new_validators = {
+            "etag": response.headers.get("ETag") or validators.get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or validators.get("last_modified"),
+            "sha256": validators.get("sha256"),
+        }
+        images = {}
+        if response.status_code == 304:
+            status = "not_modified"
+        else:
+            digest = hashlib.sha256(response.content).hexdigest()
+            if digest == validators.get("sha256"):
+                status = "unchanged"
+            else:
+                new_validators["sha256"] = digest
+                blobs = {}
+                if self.keep_original:
+                    blobs[ORIGINAL] = response.content
+                if self.sizes:
+                    blobs.update(zip(self.sizes, resize(response.content, self.sizes)))
+                created = False
+                for width, data in blobs.items():
+                    images[width], is_new = self.put_blob(data)
+                    created |= is_new
+                status = "written" if created or not blobs else "deduplicated"
+
+        with self._lock, self._conn:
+            if new_validators != validators:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO validators (video_id, etag, last_modified, sha256) "
+                    "VALUES (?, ?, ?, ?)",
+                    (video_id, new_validators["etag"], new_validators["last_modified"], new_validators["sha256"]),
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO images (video_id, width, sha256) VALUES (?, ?, ?)",
+                [(video_id, width, digest) for width, digest in images.items()],
+            )
+        return status
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _atomic_write(path, data):
+    # Write then rename, so an interrupted run never leaves a truncated file behind
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)